@@ -0,0 +1,133 @@
+"""
+Параллельный прогон тестов обоих проектов.
+
+Тесты каждого проекта делятся между процессами pytest по числу ядер,
+проекты идут одновременно. Миграции применяются один раз в снимок
+SQLite, каждый процесс получает свою копию снимка через backup API и
+запускает pytest с --reuse-db, не мигрируя базу заново.
+
+    python parallel_tests.py [--workers N] [аргументы pytest]
+"""
+import argparse
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from time import perf_counter
+
+BASE_DIR = Path(__file__).resolve().parent
+
+# Каталог проекта, модуль настроек и переменная с файлом тестовой базы.
+PROJECTS = (
+    ('ya_news', 'yanews.settings', 'YANEWS_TEST_DB'),
+    ('ya_note', 'yanote.settings', 'YANOTE_TEST_DB'),
+)
+
+# pytest завершается с кодом 5, если аргументы вроде -k не оставили
+# процессу ни одного теста.
+NO_TESTS_COLLECTED = 5
+
+BUILD_SNAPSHOT = (
+    'import django; django.setup(); '
+    'from django.db import connection; '
+    'connection.creation.create_test_db('
+    'verbosity=0, keepdb=True, serialize=False)'
+)
+
+
+def run(args, project, env=None):
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=BASE_DIR / project,
+        env={**os.environ, **(env or {})},
+        capture_output=True,
+        text=True,
+    )
+
+
+def collect(project, settings):
+    """Идентификаторы тестов проекта."""
+    result = run(
+        ['-m', 'pytest', '--collect-only', '-qqq'],
+        project,
+        {'DJANGO_SETTINGS_MODULE': settings},
+    )
+    if result.returncode:
+        sys.exit(result.stdout + result.stderr)
+    return [line for line in result.stdout.splitlines() if '::' in line]
+
+
+def build_snapshot(project, settings, variable, path):
+    """Тестовая база с применёнными миграциями."""
+    result = run(
+        ['-c', BUILD_SNAPSHOT],
+        project,
+        {'DJANGO_SETTINGS_MODULE': settings, variable: str(path)},
+    )
+    if result.returncode:
+        sys.exit(result.stdout + result.stderr)
+
+
+def clone(snapshot, target):
+    source = sqlite3.connect(snapshot)
+    copy = sqlite3.connect(target)
+    try:
+        source.backup(copy)
+    finally:
+        copy.close()
+        source.close()
+
+
+def shards(node_ids, total):
+    """Тесты по очереди раздаются процессам."""
+    return [
+        node_ids[index::total] for index in range(total)
+        if node_ids[index::total]
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--workers', type=int, default=os.cpu_count() or 1,
+        help='Процессов pytest на проект.'
+    )
+    options, pytest_args = parser.parse_known_args()
+    start = perf_counter()
+    jobs = []
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        for project, settings, variable in PROJECTS:
+            snapshot = directory / f'{project}.sqlite3'
+            build_snapshot(project, settings, variable, snapshot)
+            node_ids = collect(project, settings)
+            for number, node_ids in enumerate(
+                shards(node_ids, options.workers)
+            ):
+                database = directory / f'{project}-{number}.sqlite3'
+                clone(snapshot, database)
+                jobs.append((
+                    ['-m', 'pytest', '--reuse-db', '--tb=short', '-q',
+                     *pytest_args, *node_ids],
+                    project,
+                    {'DJANGO_SETTINGS_MODULE': settings,
+                     variable: str(database)},
+                ))
+        with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+            results = list(executor.map(lambda job: run(*job), jobs))
+    failed = False
+    for (_, project, _), result in zip(jobs, results):
+        lines = result.stdout.strip().splitlines()
+        if result.returncode not in (0, NO_TESTS_COLLECTED):
+            failed = True
+            print(result.stdout, result.stderr, sep='\n')
+        print(f'{project}: {lines[-1] if lines else result.returncode}')
+    print(f'Процессов: {len(jobs)}, время: {perf_counter() - start:.1f} с')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
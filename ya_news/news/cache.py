@@ -0,0 +1,58 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+
+KEY_PREFIX = 'news:fragment'
+HITS_KEY = f'{KEY_PREFIX}:hits'
+MISSES_KEY = f'{KEY_PREFIX}:misses'
+
+
+def fragment_key(name, vary_on):
+    """
+    Ключ фрагмента.
+
+    В vary_on передаются версии новостей, поэтому после изменения
+    новости или её комментариев старые ключи просто перестают читаться.
+    """
+    digest = md5(':'.join(map(str, vary_on)).encode()).hexdigest()
+    return f'{KEY_PREFIX}:{name}:{digest}'
+
+
+def get_or_render(name, vary_on, render):
+    """Возвращает фрагмент из кеша или рендерит и сохраняет его."""
+    key = fragment_key(name, vary_on)
+    content = cache.get(key)
+    if content is None:
+        _incr(MISSES_KEY)
+        content = render()
+        cache.set(key, content, settings.NEWS_FRAGMENT_CACHE_TIMEOUT)
+    else:
+        _incr(HITS_KEY)
+    return content
+
+
+def stats():
+    """Счётчики попаданий и промахов кеша фрагментов."""
+    counters = cache.get_many((HITS_KEY, MISSES_KEY))
+    hits = counters.get(HITS_KEY, 0)
+    misses = counters.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'ratio': hits / total if total else 0.0,
+    }
+
+
+def reset_stats():
+    cache.delete_many((HITS_KEY, MISSES_KEY))
+
+
+def _incr(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Счётчика ещё нет или он вытеснен из кеша.
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
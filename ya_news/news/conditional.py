@@ -0,0 +1,58 @@
+from hashlib import md5
+
+from django.conf import settings
+
+from .models import News
+
+
+def news_versions(request):
+    """
+    Ключи и версии новостей главной страницы.
+
+    Читаются один раз за запрос: и для ETag, и для ключа кеша.
+    """
+    if not hasattr(request, '_news_versions'):
+        request._news_versions = list(
+            News.objects.values_list(
+                'pk', 'version'
+            )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        )
+    return request._news_versions
+
+
+def news_object(request, pk):
+    """Новость страницы или None, один запрос на весь запрос."""
+    if not hasattr(request, '_news_object'):
+        request._news_object = News.objects.filter(pk=pk).first()
+    return request._news_object
+
+
+def make_etag(request, parts):
+    """
+    Хеш версий новостей и данных пользователя для ETag страницы.
+
+    Авторизованному пользователю страница показывает его имя, ссылки
+    на правку своих комментариев и форму с CSRF-токеном, поэтому в ETag
+    входят его id, имя и CSRF-cookie. Значения не раскрываются: в
+    заголовок попадает только хеш.
+    """
+    user = request.user
+    if user.is_authenticated:
+        parts = (
+            *parts,
+            user.pk,
+            user.get_username(),
+            request.META.get('CSRF_COOKIE'),
+        )
+    return md5(':'.join(map(str, parts)).encode()).hexdigest()
+
+
+def news_list_etag(request, *args, **kwargs):
+    return make_etag(request, news_versions(request))
+
+
+def news_detail_etag(request, pk):
+    news = news_object(request, pk)
+    if news is None:
+        return None
+    return make_etag(request, (news.pk, news.version))
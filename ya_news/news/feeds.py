@@ -0,0 +1,40 @@
+import json
+
+from .pagination import encode_cursor
+
+# Столько символов JSON копится перед отправкой очередной части ответа.
+CHUNK_SIZE = 16 * 1024
+
+
+def stream_comments(rows, limit):
+    """
+    JSON {"comments": [...], "next_cursor": ...} по частям.
+
+    rows — кортежи (pk, created, text, username) в порядке курсора,
+    не больше limit + 1: лишняя строка значит, что есть следующая
+    порция. Строки читаются и сериализуются по мере отдачи: ни они,
+    ни весь JSON в памяти не собираются.
+    """
+    buffer = ['{"comments": [']
+    size = 0
+    next_cursor = last = None
+    for index, (pk, created, text, username) in enumerate(rows):
+        if index == limit:
+            next_cursor = encode_cursor(*last)
+            break
+        item = json.dumps(
+            {
+                'author': username,
+                'text': text,
+                'created': created.isoformat(),
+            },
+            ensure_ascii=False,
+        )
+        buffer.append(f',{item}' if index else item)
+        size += len(item)
+        last = (created, pk)
+        if size >= CHUNK_SIZE:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    buffer.append(f'], "next_cursor": {json.dumps(next_cursor)}}}')
+    yield ''.join(buffer)
@@ -0,0 +1,82 @@
+from datetime import date, timedelta
+from statistics import median
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from news.models import News
+from news.pagination import encode_cursor, keyset_paginate
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время выборки страниц архива по курсору и через OFFSET '
+        'на разной глубине. Тестовые новости создаются внутри транзакции, '
+        'которая в конце откатывается.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument(
+            '--depths', default='1,10,100,1000,10000',
+            help='Номера страниц через запятую.'
+        )
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        per_page = settings.NEWS_COUNT_ON_HOME_PAGE
+        depths = [int(depth) for depth in options['depths'].split(',')]
+        with transaction.atomic():
+            self.seed(options['rows'], options['batch_size'])
+            queryset = News.objects.order_by('-date', '-pk')
+            self.stdout.write(f'{"страница":>10} {"cursor, мс":>12} '
+                              f'{"OFFSET, мс":>12}')
+            for depth in depths:
+                offset = (depth - 1) * per_page
+                if offset >= options['rows']:
+                    break
+                cursor = None
+                if offset:
+                    last = queryset.values_list('date', 'pk')[offset - 1]
+                    cursor = encode_cursor(*last)
+                keyset = self.measure(
+                    lambda: keyset_paginate(
+                        News.objects.all(), 'date', cursor=cursor,
+                        per_page=per_page, descending=True,
+                    ),
+                    options['repeat'],
+                )
+                offset_time = self.measure(
+                    lambda: list(queryset[offset:offset + per_page]),
+                    options['repeat'],
+                )
+                self.stdout.write(
+                    f'{depth:>10} {keyset:>12.3f} {offset_time:>12.3f}'
+                )
+            transaction.set_rollback(True)
+
+    def seed(self, rows, batch_size):
+        """Создаёт rows новостей, по 50 за день."""
+        today = date.today()
+        for start in range(0, rows, batch_size):
+            News.objects.bulk_create(
+                News(
+                    title=f'Новость {index}',
+                    text='Текст новости',
+                    date=today - timedelta(days=index // 50),
+                )
+                for index in range(start, min(start + batch_size, rows))
+            )
+
+    @staticmethod
+    def measure(func, repeat):
+        """Медиана времени выполнения func в миллисекундах."""
+        timings = []
+        for _ in range(repeat):
+            start = perf_counter()
+            func()
+            timings.append((perf_counter() - start) * 1000)
+        return median(timings)
@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from news import loadtest
+from news.models import News
+
+User = get_user_model()
+
+# Где живут сессия и пользователь сессии.
+MODES = {
+    'db': (
+        'django.contrib.sessions.backends.db',
+        'django.contrib.auth.backends.ModelBackend',
+    ),
+    'cached': (
+        'django.contrib.sessions.backends.cached_db',
+        'news.auth.CachedModelBackend',
+    ),
+    'signed': (
+        'django.contrib.sessions.backends.signed_cookies',
+        'news.auth.CachedModelBackend',
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Запросы к базе и задержка страницы новости для авторизованного '
+        'пользователя, когда сессия и пользователь читаются из базы (db), '
+        'из кеша (cached) или сессия хранится в подписанной cookie '
+        '(signed). Работает на текущей базе (см. generate_data).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Запросов на режим.'
+        )
+        parser.add_argument('--concurrency', type=int, default=4)
+
+    def handle(self, *args, **options):
+        news = News.objects.order_by('pk').first()
+        user = User.objects.order_by('pk').first()
+        if news is None or user is None:
+            raise CommandError(
+                'Нет новостей или пользователей: сначала выполните '
+                'generate_data.'
+            )
+        url = reverse('news:detail', args=(news.pk,))
+        self.stdout.write(
+            f'{"режим":<8} {"запросов":>8} {"ошибок":>6} {"rps":>8} '
+            f'{"p50":>8} {"p95":>8} {"к базе":>7}'
+        )
+        for mode, (engine, backend) in MODES.items():
+            with override_settings(
+                SESSION_ENGINE=engine, AUTHENTICATION_BACKENDS=[backend]
+            ):
+                # Middleware читает настройки при создании приложения.
+                application = WSGIHandler()
+                clients = [
+                    self.user_client(application, user)
+                    for _ in range(options['concurrency'])
+                ]
+                result = loadtest.run_scenario(
+                    lambda client, number: client.get(url),
+                    clients,
+                    options['requests'],
+                )
+            self.stdout.write(
+                f'{mode:<8} {result["requests"]:>8} {result["errors"]:>6} '
+                f'{result["rps"]:>8} {result["p50"]:>8} {result["p95"]:>8} '
+                f'{result["queries"]:>7}'
+            )
+
+    def user_client(self, application, user):
+        login = Client()
+        login.force_login(user)
+        return loadtest.WSGIClient(
+            application,
+            {name: morsel.value for name, morsel in login.cookies.items()},
+        )
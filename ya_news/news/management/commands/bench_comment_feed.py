@@ -0,0 +1,116 @@
+import json
+import re
+from time import process_time
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+
+from news.models import News
+
+# Ссылка «Показать ещё комментарии» из includes/comments.html.
+MORE_RE = re.compile(
+    rb'class="js-more-comments" href="[^"?]*\?cursor=([^"]+)"'
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает ленту комментариев в JSON (news:comment_feed) со '
+        'страницей новости и порциями комментариев в HTML: байты и '
+        'процессорное время на комментарий при чтении всех комментариев '
+        'новости анонимным клиентом. Работает на текущей базе (см. '
+        'generate_data --comments-per-news).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--news', type=int,
+            help='id новости; по умолчанию — с наибольшим числом '
+                 'комментариев.'
+        )
+        parser.add_argument('--rounds', type=int, default=5)
+        parser.add_argument(
+            '--host', default='localhost',
+            help='Имя сайта из ALLOWED_HOSTS для запросов к страницам.'
+        )
+
+    def handle(self, *args, **options):
+        news = self.pick_news(options['news'])
+        total = news.comment_count
+        if not total:
+            raise CommandError(f'У новости {news.pk} нет комментариев.')
+        self.client = Client(HTTP_HOST=options['host'])
+        self.stdout.write(
+            f'Новость {news.pk}, комментариев: {total}, порция: '
+            f'{settings.COMMENTS_PER_PAGE}.'
+        )
+        self.stdout.write(
+            f'{"формат":<6} {"байт":>10} {"байт/комм.":>11} '
+            f'{"мкс CPU/комм.":>14}'
+        )
+        for name, read in (('html', self.read_html), ('json', self.read_json)):
+            size = cpu = 0
+            for _ in range(options['rounds']):
+                # Кеш фрагментов выровнял бы HTML с JSON не по делу.
+                cache.clear()
+                start = process_time()
+                size = read(news)
+                cpu += process_time() - start
+            cpu /= options['rounds']
+            self.stdout.write(
+                f'{name:<6} {size:>10} {size / total:>11.1f} '
+                f'{cpu / total * 1_000_000:>14.1f}'
+            )
+
+    def pick_news(self, pk):
+        if pk is not None:
+            news = News.objects.filter(pk=pk).first()
+            if news is None:
+                raise CommandError(f'Новости {pk} нет.')
+            return news
+        news = News.objects.annotate(
+            total=Count('comment')
+        ).order_by('-total').first()
+        if news is None:
+            raise CommandError(
+                'Нет новостей: сначала выполните generate_data.'
+            )
+        return news
+
+    def get(self, url, params=None):
+        response = self.client.get(url, params)
+        if response.status_code != 200:
+            raise CommandError(f'{url}: ответ {response.status_code}.')
+        if response.streaming:
+            return b''.join(response.streaming_content)
+        return response.content
+
+    def read_html(self, news):
+        """Страница новости и все порции «Показать ещё комментарии»."""
+        content = self.get(reverse('news:detail', args=(news.pk,)))
+        size = len(content)
+        url = reverse('news:comments', args=(news.pk,))
+        match = MORE_RE.search(content)
+        while match:
+            content = self.get(url, {'cursor': unquote(match[1].decode())})
+            size += len(content)
+            match = MORE_RE.search(content)
+        return size
+
+    def read_json(self, news):
+        """Все порции ленты того же размера, что и порции HTML."""
+        url = reverse('news:comment_feed', args=(news.pk,))
+        params = {'limit': settings.COMMENTS_PER_PAGE}
+        size = 0
+        while True:
+            content = self.get(url, params)
+            size += len(content)
+            cursor = json.loads(content)['next_cursor']
+            if cursor is None:
+                return size
+            params['cursor'] = cursor
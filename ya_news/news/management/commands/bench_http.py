@@ -0,0 +1,156 @@
+import platform
+from itertools import count
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from news import loadtest
+from news.models import News
+
+User = get_user_model()
+
+SCENARIOS = ('home', 'detail', 'comment')
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный прогон через WSGI-приложение yanews.wsgi: главная, '
+        'страница новости и отправка комментария параллельными '
+        'клиентами. Печатает p50/p95/p99 в мс, запросы в секунду и '
+        'запросы к базе на запрос, сохраняет и сравнивает JSON-замеры. '
+        'Работает на текущей базе (см. generate_data) и добавляет в неё '
+        'комментарии.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=500,
+            help='Запросов на сценарий.'
+        )
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument(
+            '--scenarios', default=','.join(SCENARIOS),
+            help='Сценарии через запятую: ' + ', '.join(SCENARIOS) + '.'
+        )
+        parser.add_argument('--save', help='Сохранить замер в JSON-файл.')
+        parser.add_argument(
+            '--compare', help='Сравнить с сохранённым замером.'
+        )
+        parser.add_argument(
+            '--max-regression', type=float,
+            help='Ошибка, если p95 или число запросов к базе выросли '
+                 'больше чем на столько процентов.'
+        )
+
+    def handle(self, *args, **options):
+        from yanews.wsgi import application
+
+        names = options['scenarios'].split(',')
+        unknown = set(names) - set(SCENARIOS)
+        if unknown:
+            raise CommandError('Неизвестные сценарии: ' + ', '.join(unknown))
+        self.news_ids = list(News.objects.values_list('pk', flat=True)[:1000])
+        if not self.news_ids:
+            raise CommandError(
+                'Нет новостей: сначала выполните generate_data.'
+            )
+        self.sequence = count()
+        concurrency = options['concurrency']
+        results = {}
+        self.stdout.write(
+            f'{"сценарий":<10} {"запросов":>8} {"ошибок":>6} {"rps":>8} '
+            f'{"p50":>8} {"p95":>8} {"p99":>8} {"к базе":>7}'
+        )
+        for name in names:
+            if name == 'comment':
+                clients = self.user_clients(application, concurrency)
+            else:
+                clients = [
+                    loadtest.WSGIClient(application)
+                    for _ in range(concurrency)
+                ]
+            result = loadtest.run_scenario(
+                getattr(self, f'request_{name}'), clients, options['requests']
+            )
+            results[name] = result
+            self.stdout.write(
+                f'{name:<10} {result["requests"]:>8} {result["errors"]:>6} '
+                f'{result["rps"]:>8} {result["p50"]:>8} {result["p95"]:>8} '
+                f'{result["p99"]:>8} {result["queries"]:>7}'
+            )
+        if options['compare']:
+            self.compare(
+                loadtest.load_baseline(options['compare']),
+                results,
+                options['max_regression'],
+            )
+        if options['save']:
+            loadtest.save_baseline(
+                options['save'],
+                results,
+                created=timezone.now().isoformat(),
+                requests=options['requests'],
+                concurrency=concurrency,
+                python=platform.python_version(),
+                django=django.get_version(),
+            )
+
+    def user_clients(self, application, total):
+        """Клиенты с сессиями разных пользователей и CSRF-cookie."""
+        users = list(User.objects.order_by('pk')[:total])
+        if not users:
+            raise CommandError(
+                'Нет пользователей: сначала выполните generate_data.'
+            )
+        clients = []
+        for index in range(total):
+            login = Client()
+            login.force_login(users[index % len(users)])
+            client = loadtest.WSGIClient(
+                application,
+                {name: morsel.value for name, morsel in login.cookies.items()},
+            )
+            client.get(self.detail_url(0))
+            clients.append(client)
+        return clients
+
+    def detail_url(self, number):
+        return reverse(
+            'news:detail', args=(self.news_ids[number % len(self.news_ids)],)
+        )
+
+    def request_home(self, client, number):
+        return client.get(reverse('news:home'))
+
+    def request_detail(self, client, number):
+        return client.get(self.detail_url(number))
+
+    def request_comment(self, client, number):
+        return client.post(
+            self.detail_url(number),
+            {'text': f'Комментарий нагрузочного теста {next(self.sequence)}'},
+        )
+
+    def compare(self, baseline, results, max_regression):
+        changes = loadtest.compare(baseline, results)
+        regressions = []
+        for name, change in changes.items():
+            self.stdout.write(
+                f'{name:<10} ' + ' '.join(
+                    f'{metric} {change[metric]:+.1f}%'
+                    for metric in loadtest.METRICS
+                )
+            )
+            if max_regression is not None and (
+                change['p95'] > max_regression
+                or change['queries'] > max_regression
+            ):
+                regressions.append(name)
+        if regressions:
+            raise CommandError(
+                'Хуже базового замера: ' + ', '.join(regressions)
+            )
@@ -0,0 +1,68 @@
+import random
+from statistics import median
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from news.profanity import Matcher
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщэюя'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает поиск запрещённых слов автоматом Ахо — Корасик '
+        'с построчной проверкой каждого слова на длинных текстах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--words', default='10,1000,10000',
+            help='Размеры словаря через запятую.'
+        )
+        parser.add_argument(
+            '--text-length', type=int, default=20_000,
+            help='Длина проверяемого текста в символах.'
+        )
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        # Чистый текст: худший случай, когда нужно дочитать до конца.
+        text = ''.join(
+            rng.choice(ALPHABET + ' ') for _ in range(options['text_length'])
+        )
+        lowered_text = text.lower()
+        self.stdout.write(
+            f'{"слов":>8} {"сборка, мс":>12} {"автомат, мс":>12} '
+            f'{"перебор, мс":>12}'
+        )
+        for size in map(int, options['words'].split(',')):
+            words = [
+                ''.join(rng.choice(ALPHABET) for _ in range(12))
+                for _ in range(size)
+            ]
+            start = perf_counter()
+            matcher = Matcher(words)
+            build = (perf_counter() - start) * 1000
+            automaton = self.measure(
+                lambda: matcher.search(text), options['repeat']
+            )
+            naive = self.measure(
+                lambda: any(word in lowered_text for word in words),
+                options['repeat'],
+            )
+            self.stdout.write(
+                f'{size:>8} {build:>12.2f} {automaton:>12.2f} {naive:>12.2f}'
+            )
+
+    @staticmethod
+    def measure(func, repeat):
+        """Медиана времени выполнения func в миллисекундах."""
+        timings = []
+        for _ in range(repeat):
+            start = perf_counter()
+            func()
+            timings.append((perf_counter() - start) * 1000)
+        return median(timings)
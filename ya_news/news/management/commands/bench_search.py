@@ -0,0 +1,80 @@
+import random
+from statistics import median
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from news.models import News
+from news.search import search_news
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщэюя'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает полнотекстовый поиск FTS5 с полным просмотром '
+        'через icontains. Новости создаются внутри транзакции, '
+        'которая в конце откатывается.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument('--vocabulary', type=int, default=50_000)
+        parser.add_argument('--words-per-news', type=int, default=40)
+        parser.add_argument('--queries', type=int, default=20)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        vocabulary = [
+            ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(4, 10)))
+            for _ in range(options['vocabulary'])
+        ]
+        limit = settings.NEWS_SEARCH_LIMIT
+        with transaction.atomic():
+            start = perf_counter()
+            self.seed(rng, vocabulary, options)
+            self.stdout.write(
+                f'Создано {options["rows"]} новостей '
+                f'за {perf_counter() - start:.1f} с'
+            )
+            queries = rng.sample(vocabulary, options['queries'])
+            fts = self.measure(lambda word: search_news(word, limit), queries)
+            scan = self.measure(
+                lambda word: list(
+                    News.objects.filter(text__icontains=word)[:limit]
+                ),
+                queries,
+            )
+            self.stdout.write(
+                f'Медиана на запрос: FTS5 {fts:.2f} мс, '
+                f'icontains {scan:.2f} мс'
+            )
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def seed(rng, vocabulary, options):
+        rows = options['rows']
+        for start in range(0, rows, options['batch_size']):
+            News.objects.bulk_create(
+                News(
+                    title=' '.join(rng.choices(vocabulary, k=3)),
+                    text=' '.join(
+                        rng.choices(vocabulary, k=options['words_per_news'])
+                    ),
+                )
+                for _ in range(start, min(start + options['batch_size'], rows))
+            )
+
+    @staticmethod
+    def measure(func, queries):
+        """Медиана времени одного запроса в миллисекундах."""
+        timings = []
+        for word in queries:
+            start = perf_counter()
+            func(word)
+            timings.append((perf_counter() - start) * 1000)
+        return median(timings)
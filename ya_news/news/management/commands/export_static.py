@@ -0,0 +1,153 @@
+import json
+import os
+import sys
+from hashlib import md5, sha256
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler, WSGIRequest
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from news.models import News
+
+MANIFEST = 'manifest.json'
+
+
+def write_atomic(path, content):
+    """Сервер статики не увидит наполовину записанный файл."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f'.{path.name}.tmp')
+    temporary.write_bytes(content)
+    os.replace(temporary, path)
+
+
+def stamp(values):
+    return md5(':'.join(map(str, values)).encode()).hexdigest()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сохраняет главную, первую страницу архива и страницы новостей '
+        'такими, какими их видит анонимный пользователь, в каталог '
+        'HTML-файлов: URL /news/1/ — файл news/1/index.html. Повторный '
+        'запуск перерисовывает только страницы, версии новостей которых '
+        'изменились, и удаляет страницы удалённых новостей; состояние '
+        'хранится в manifest.json. Остальные адреса (вход, курсоры '
+        'архива и комментариев) сервер статики передаёт в yanews.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Каталог для HTML-файлов.')
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Перерисовать все страницы, например после правки '
+                 'шаблонов.'
+        )
+        parser.add_argument(
+            '--host', default='localhost',
+            help='Имя сайта из ALLOWED_HOSTS для запросов к страницам.'
+        )
+
+    def handle(self, *args, **options):
+        self.root = Path(options['directory'])
+        self.handler = WSGIHandler()
+        self.host = options['host']
+        manifest_path = self.root / MANIFEST
+        old = {}
+        if manifest_path.exists() and not options['full']:
+            old = json.loads(manifest_path.read_text(encoding='utf-8'))
+        pages = {}
+        self.rendered = self.written = 0
+        for url, page_stamp in self.pages():
+            pages[url] = self.export(url, page_stamp, old.get(url))
+        removed = 0
+        for url in old.keys() - pages.keys():
+            path = self.root / old[url]['file']
+            path.unlink(missing_ok=True)
+            if path.parent != self.root and not any(path.parent.iterdir()):
+                path.parent.rmdir()
+            removed += 1
+        write_atomic(
+            manifest_path,
+            json.dumps(pages, ensure_ascii=False, indent=2).encode(),
+        )
+        self.stdout.write(
+            f'Страниц: {len(pages)}, перерисовано: {self.rendered}, '
+            f'записано: {self.written}, удалено: {removed}.'
+        )
+
+    def pages(self):
+        """
+        URL страниц и отпечатки их данных.
+
+        Отпечаток считается без отрисовки: по версиям новостей, которые
+        растут при любой правке новости и её комментариев.
+        """
+        count = settings.NEWS_COUNT_ON_HOME_PAGE
+        yield reverse('news:home'), stamp(
+            News.objects.values_list('pk', 'version')[:count]
+        )
+        # Лишняя новость в отпечатке — ссылка на следующую страницу.
+        yield reverse('news:archive'), stamp(
+            News.objects.order_by('-date', '-pk').values_list(
+                'pk', 'version'
+            )[:count + 1]
+        )
+        for pk, version in News.objects.values_list(
+                'pk', 'version'
+        ).iterator():
+            yield reverse('news:detail', args=(pk,)), str(version)
+
+    def export(self, url, page_stamp, previous):
+        """
+        Отрисовывает страницу, если её отпечаток изменился.
+
+        Файл перезаписывается только при изменении содержимого, чтобы
+        сервер статики не сбрасывал свои ETag и кеши.
+        """
+        path = str(Path(url.strip('/'), 'index.html'))
+        target = self.root / path
+        if (
+            previous is not None
+            and previous['stamp'] == page_stamp
+            and target.exists()
+        ):
+            return previous
+        response = self.render(url)
+        if response.status_code != 200:
+            raise CommandError(f'{url}: ответ {response.status_code}.')
+        self.rendered += 1
+        content_hash = sha256(response.content).hexdigest()
+        if (
+            previous is None
+            or previous['hash'] != content_hash
+            or not target.exists()
+        ):
+            write_atomic(target, response.content)
+            self.written += 1
+        return {'file': path, 'stamp': page_stamp, 'hash': content_hash}
+
+    def render(self, url):
+        """
+        Ответ на анонимный GET, как через WSGI-сервер.
+
+        Запрос проходит все middleware сайта, но не ждёт сети.
+        """
+        return self.handler.get_response(WSGIRequest({
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': url,
+            'QUERY_STRING': '',
+            'HTTP_HOST': self.host,
+            'SERVER_NAME': self.host,
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': BytesIO(),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': False,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }))
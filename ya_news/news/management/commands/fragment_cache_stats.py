@@ -0,0 +1,49 @@
+import json
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+
+from news.cache import reset_stats, stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает долю попаданий в кеш фрагментов. У locmem счётчики '
+        'свои в каждом процессе, поэтому для запущенного сервера нужен '
+        '--url, например http://127.0.0.1:8000/__fragments__/.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            help=(
+                'Адрес FRAGMENT_CACHE_METRICS_URL сервера; без него '
+                'счётчики читаются из кеша этого процесса.'
+            ),
+        )
+        parser.add_argument(
+            '--reset', action='store_true', help='Обнулить счётчики.'
+        )
+
+    def handle(self, *args, **options):
+        if options['url']:
+            current = self.fetch(options['url'], options['reset'])
+        else:
+            current = stats()
+            if options['reset']:
+                reset_stats()
+        self.stdout.write(
+            f'Попаданий: {current["hits"]}, промахов: {current["misses"]}, '
+            f'доля попаданий: {current["ratio"]:.1%}'
+        )
+
+    @staticmethod
+    def fetch(url, reset):
+        if reset:
+            url += '&reset' if '?' in url else '?reset'
+        try:
+            with urlopen(url, timeout=10) as response:
+                return json.load(response)
+        except (URLError, ValueError) as error:
+            raise CommandError(f'Не удалось получить {url}: {error}.')
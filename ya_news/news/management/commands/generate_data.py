@@ -0,0 +1,95 @@
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from news.models import Comment, News
+
+User = get_user_model()
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщэюя'
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет базу синтетическими пользователями, новостями и '
+        'комментариями для нагрузочных прогонов (см. bench_http). '
+        'Пользователи user0, user1, … создаются без пароля; '
+        'уже существующие переиспользуются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--news', type=int, default=1000)
+        parser.add_argument('--comments-per-news', type=int, default=10)
+        parser.add_argument('--vocabulary', type=int, default=2000)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        vocabulary = [
+            ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(3, 10)))
+            for _ in range(options['vocabulary'])
+        ]
+        batch_size = options['batch_size']
+        user_ids = self.create_users(options['users'], batch_size)
+        last_news_id = News.objects.aggregate(last=Max('pk'))['last'] or 0
+        today = date.today()
+        for start in range(0, options['news'], batch_size):
+            News.objects.bulk_create(
+                News(
+                    title=' '.join(rng.choices(vocabulary, k=5)).title(),
+                    text=' '.join(rng.choices(vocabulary, k=60)),
+                    date=today - timedelta(days=index // 50),
+                )
+                for index in range(
+                    start, min(start + batch_size, options['news'])
+                )
+            )
+        new_news = News.objects.filter(pk__gt=last_news_id)
+        comments = []
+        for news_id in new_news.values_list('pk', flat=True).iterator():
+            for _ in range(options['comments_per_news']):
+                comments.append(Comment(
+                    news_id=news_id,
+                    author_id=rng.choice(user_ids),
+                    text=' '.join(rng.choices(vocabulary, k=12)),
+                ))
+            if len(comments) >= batch_size:
+                Comment.objects.bulk_create(comments)
+                comments = []
+        Comment.objects.bulk_create(comments)
+        # bulk_create не вызывает сигналы, счётчики считаются отдельно.
+        new_news.recount_comments()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пользователей: {len(user_ids)}, новостей: {options["news"]}, '
+            'комментариев: '
+            f'{options["news"] * options["comments_per_news"]}'
+        ))
+
+    @staticmethod
+    def create_users(total, batch_size):
+        password = make_password(None)
+        user_ids = []
+        for start in range(0, total, batch_size):
+            usernames = [
+                f'user{index}'
+                for index in range(start, min(start + batch_size, total))
+            ]
+            User.objects.bulk_create(
+                (
+                    User(username=username, password=password)
+                    for username in usernames
+                ),
+                ignore_conflicts=True,
+            )
+            user_ids.extend(User.objects.filter(
+                username__in=usernames
+            ).values_list('pk', flat=True))
+        return user_ids
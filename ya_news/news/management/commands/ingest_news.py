@@ -0,0 +1,281 @@
+import json
+import sys
+from collections import OrderedDict
+from contextlib import contextmanager
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import reset_queries, transaction
+from django.utils import timezone
+
+from news.models import Comment, News
+
+User = get_user_model()
+
+CHUNK_SIZE = 64 * 1024
+# Запись JSON-массива длиннее этого считается ошибкой: иначе испорченный
+# файл дочитывался бы в память целиком.
+MAX_RECORD_SIZE = 16 * CHUNK_SIZE
+# Не больше значений в одном IN (...): SQLite до 3.32 принимает
+# не больше 999 параметров в запросе.
+MAX_IN_VALUES = 900
+
+
+def in_chunks(values):
+    """Значения для фильтра __in порциями не больше MAX_IN_VALUES."""
+    values = list(values)
+    for start in range(0, len(values), MAX_IN_VALUES):
+        yield values[start:start + MAX_IN_VALUES]
+
+
+def iter_ndjson(stream):
+    for number, line in enumerate(stream, 1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as error:
+                raise CommandError(f'Строка {number}: {error}')
+
+
+def iter_json_array(stream):
+    """
+    Элементы JSON-массива по одному, без чтения файла целиком.
+
+    В памяти держится только текущий фрагмент входа. Если разбор
+    ломается в данных, за которыми уже дочитан целый фрагмент, это
+    ошибка синтаксиса, а не обрезанная запись: она сообщается сразу.
+    Исключение — незакрытая строка, она может быть длиннее фрагмента.
+    """
+    decoder = json.JSONDecoder()
+    buffer = stream.read(CHUNK_SIZE).lstrip()
+    if not buffer.startswith('['):
+        raise CommandError('Ожидался JSON-массив.')
+    position = 1
+    # Разбор до этой позиции буфера уже видел целый следующий фрагмент.
+    checked = 0
+    while True:
+        buffer, position = _skip_separators(stream, buffer, position)
+        if buffer[position] == ']':
+            return
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError as error:
+            if error.pos < checked and not error.msg.startswith(
+                    'Unterminated string'
+            ):
+                raise CommandError(f'Некорректный JSON: {error.msg}.')
+            if len(buffer) - position > MAX_RECORD_SIZE:
+                raise CommandError(
+                    f'Запись JSON длиннее {MAX_RECORD_SIZE} символов.'
+                )
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                raise CommandError('Некорректный JSON в конце файла.')
+            buffer, position = buffer[position:] + chunk, 0
+            checked = len(buffer) - len(chunk)
+            continue
+        checked = 0
+        yield item
+
+
+def _skip_separators(stream, buffer, position):
+    """Пропускает пробелы и запятые, дочитывая вход при необходимости."""
+    while True:
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        if position < len(buffer):
+            return buffer, position
+        buffer, position = stream.read(CHUNK_SIZE), 0
+        if not buffer:
+            raise CommandError('JSON-массив не закрыт.')
+
+
+class AuthorCache:
+    """
+    Имя пользователя → id с ограниченным размером.
+
+    Неизвестные имена одной пачки ищутся одним запросом на каждые
+    MAX_IN_VALUES имён.
+    """
+
+    def __init__(self, size, create_missing):
+        self.size = size
+        self.create_missing = create_missing
+        self._ids = OrderedDict()
+
+    def resolve(self, usernames):
+        """
+        Id всех имён пачки.
+
+        Кеш обрезается до size только после того, как пачка собрана:
+        авторов в пачке может быть больше, чем мест в кеше.
+        """
+        ids = {
+            name: self._ids[name] for name in usernames if name in self._ids
+        }
+        missing = set(usernames) - ids.keys()
+        if missing:
+            found = self._find(missing)
+            unknown = missing - found.keys()
+            if unknown and not self.create_missing:
+                raise CommandError(
+                    'Неизвестные авторы: ' + ', '.join(sorted(unknown))
+                )
+            if unknown:
+                User.objects.bulk_create(
+                    User(username=name, password=make_password(None))
+                    for name in unknown
+                )
+                found.update(self._find(unknown))
+            ids.update(found)
+        for name, pk in ids.items():
+            self._ids[name] = pk
+            self._ids.move_to_end(name)
+        while len(self._ids) > self.size:
+            self._ids.popitem(last=False)
+        return ids
+
+    @staticmethod
+    def _find(usernames):
+        found = {}
+        for chunk in in_chunks(usernames):
+            found.update(User.objects.filter(
+                username__in=chunk
+            ).values_list('username', 'pk'))
+        return found
+
+
+@contextmanager
+def explicit_created():
+    """
+    Отключает auto_now_add у Comment.created на время одного bulk_create.
+
+    Иначе bulk_create затрёт даты комментариев из входных данных.
+    Поле общее для всего процесса, поэтому прежнее значение
+    возвращается сразу после вставки, даже при ошибке.
+    """
+    field = Comment._meta.get_field('created')
+    previous = field.auto_now_add
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = previous
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково загружает новости и комментарии из NDJSON или '
+        'JSON-массива в формате фикстур: {"model": "news.news", "pk": 1, '
+        '"fields": {...}}. Автор комментария указывается именем '
+        'пользователя. Файл *.json читается как массив, остальное и '
+        'stdin — как NDJSON. Записи сохраняются через bulk_create '
+        'пачками, каждая пачка в своей транзакции.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл или - для stdin.')
+        parser.add_argument(
+            '--format', choices=('auto', 'ndjson', 'json'), default='auto'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--author-cache-size', type=int, default=10_000)
+        parser.add_argument(
+            '--create-authors', action='store_true',
+            help='Создавать пользователей с неизвестными именами.'
+        )
+        parser.add_argument(
+            '--progress-every', type=int, default=100_000,
+            help='Печатать скорость каждые N записей.'
+        )
+
+    def handle(self, *args, **options):
+        for option in ('batch_size', 'author_cache_size', 'progress_every'):
+            if options[option] < 1:
+                raise CommandError(
+                    f'--{option.replace("_", "-")} должен быть не меньше 1.'
+                )
+        self.batch_size = options['batch_size']
+        self.authors = AuthorCache(
+            options['author_cache_size'], options['create_authors']
+        )
+        self.news, self.comments = [], []
+        self.loaded = 0
+        self.started = perf_counter()
+        stream = (
+            sys.stdin if options['path'] == '-'
+            else open(options['path'], encoding='utf-8')
+        )
+        try:
+            records = self.iter_records(
+                stream, options['path'], options['format']
+            )
+            for record in records:
+                self.add(record)
+                if self.loaded % options['progress_every'] == 0:
+                    self.report()
+            self.flush()
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        self.report(style=self.style.SUCCESS)
+
+    @staticmethod
+    def iter_records(stream, path, data_format):
+        if data_format == 'auto':
+            data_format = 'json' if path.endswith('.json') else 'ndjson'
+        if data_format == 'json':
+            return iter_json_array(stream)
+        return iter_ndjson(stream)
+
+    def add(self, record):
+        model = record.get('model')
+        fields = dict(record.get('fields', {}))
+        if 'pk' in record:
+            fields['id'] = record['pk']
+        if model == 'news.news':
+            self.news.append(fields)
+        elif model == 'news.comment':
+            self.comments.append(fields)
+        else:
+            raise CommandError(f'Неизвестная модель: {model}')
+        self.loaded += 1
+        if len(self.news) + len(self.comments) >= self.batch_size:
+            self.flush()
+
+    @transaction.atomic
+    def flush(self):
+        if self.news:
+            News.objects.bulk_create(
+                News(**fields) for fields in self.news
+            )
+        if self.comments:
+            authors = self.authors.resolve(
+                {fields['author'] for fields in self.comments}
+            )
+            now = timezone.now()
+            comments = []
+            for fields in self.comments:
+                fields['news_id'] = fields.pop('news')
+                fields['author_id'] = authors[fields.pop('author')]
+                fields.setdefault('created', now)
+                comments.append(Comment(**fields))
+            with explicit_created():
+                Comment.objects.bulk_create(comments)
+            # bulk_create не вызывает сигналы: счётчики и версии
+            # новостей пересчитываются в той же транзакции.
+            for chunk in in_chunks({comment.news_id for comment in comments}):
+                News.objects.filter(pk__in=chunk).recount_comments()
+        self.news, self.comments = [], []
+        # При DEBUG = True Django копит текст запросов в памяти.
+        reset_queries()
+
+    def report(self, style=None):
+        elapsed = perf_counter() - self.started
+        message = (
+            f'Загружено записей: {self.loaded} за {elapsed:.1f} с, '
+            f'{self.loaded / elapsed if elapsed else 0:.0f} записей/с'
+        )
+        self.stdout.write(style(message) if style else message)
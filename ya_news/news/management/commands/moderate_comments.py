@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from news.moderation import moderate_pending
+
+
+class Command(BaseCommand):
+    help = (
+        'Модерирует комментарии, оставшиеся в ожидании, например после '
+        'перезапуска сервера с непустой очередью воркеров.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        statuses = moderate_pending(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Опубликовано: {statuses["approved"]}, '
+            f'отклонено: {statuses["rejected"]}'
+        ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from news.models import News
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счётчики комментариев у новостей. '
+        'Нужен после loaddata и массовой загрузки комментариев.'
+    )
+
+    def handle(self, *args, **options):
+        updated = News.objects.recount_comments()
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано новостей: {updated}')
+        )
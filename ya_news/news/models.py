@@ -1,27 +1,104 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+# Идёт удаление новостей: их комментарии удаляются каскадом, и
+# обновлять счётчики удаляемых новостей незачем.
+news_deleting = ContextVar('news_deleting', default=False)
+
+
+@contextmanager
+def deleting_news():
+    token = news_deleting.set(True)
+    try:
+        yield
+    finally:
+        news_deleting.reset(token)
+
+
+class NewsQuerySet(models.QuerySet):
+
+    def delete(self):
+        with deleting_news():
+            return super().delete()
+
+    def recount_comments(self):
+        """Пересчитывает счётчик опубликованных комментариев."""
+        comments = Comment.objects.approved().filter(
+            news=OuterRef('pk')
+        ).order_by().values('news').annotate(
+            total=Count('pk')
+        ).values('total')
+        return self.update(
+            comment_count=Coalesce(Subquery(comments), 0),
+            version=F('version') + 1,
+        )
 
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    # Растёт при любом изменении новости или её комментариев,
+    # входит в ключи кеша фрагментов.
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    objects = NewsQuerySet.as_manager()
+
+    # Поля, которые меняются только атомарными UPDATE из news.signals.
+    COUNTER_FIELDS = ('comment_count', 'version')
 
     class Meta:
         ordering = ('-date',)
+        indexes = (
+            # Ключ keyset-пагинации архива.
+            models.Index(fields=('date', 'id'), name='news_date_id_idx'),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        """Не затираем счётчики устаревшими значениями из памяти."""
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with deleting_news():
+            return super().delete(*args, **kwargs)
+
+
+class CommentQuerySet(models.QuerySet):
+
+    def approved(self):
+        return self.filter(status=Comment.Status.APPROVED)
+
 
 class Comment(models.Model):
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'На модерации'
+        APPROVED = 'approved', 'Опубликован'
+        REJECTED = 'rejected', 'Отклонён'
+
+    # Поиск по новости идёт по префиксу индекса (news, created).
     news = models.ForeignKey(
         News,
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -29,9 +106,44 @@ class Comment(models.Model):
     )
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
+    # Комментарии с сайта создаются на модерации (см. news.moderation),
+    # из админки и фикстур — сразу опубликованными.
+    status = models.CharField(
+        max_length=16,
+        choices=Status.choices,
+        default=Status.APPROVED,
+    )
+
+    objects = CommentQuerySet.as_manager()
 
     class Meta:
         ordering = ('created',)
+        indexes = (
+            # Комментарии новости читаются по порядку без сортировки.
+            models.Index(
+                fields=('news', 'created'), name='comment_news_created_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'status' in field_names:
+            # По статусу из базы сигналы замечают публикацию и снятие.
+            instance._saved_status = instance.status
+        if 'news_id' in field_names:
+            # А по новости — перенос комментария в другую новость.
+            instance._saved_news_id = instance.news_id
+        return instance
+
+    @property
+    def is_approved(self):
+        return self.status == self.Status.APPROVED
+
+    def save(self, *args, **kwargs):
+        # Счётчик в News обновляется сигналом в той же транзакции.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
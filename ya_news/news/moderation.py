@@ -0,0 +1,123 @@
+import logging
+import re
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, transaction
+
+from .models import Comment
+from .signals import touch_news
+
+logger = logging.getLogger(__name__)
+
+LINK_RE = re.compile(r'https?://|www\.', re.IGNORECASE)
+
+# Модерация читает только основную базу: в фоновых потоках и командах
+# нет запроса, который закрепил бы чтение за ней, а реплика может ещё
+# не знать о только что сохранённом комментарии.
+PRIMARY = DEFAULT_DB_ALIAS
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def check(comment):
+    """
+    Решение модерации: новый статус комментария.
+
+    Запрещённые слова сюда не доходят: их отклоняет CommentForm.
+    """
+    if len(LINK_RE.findall(comment.text)) > settings.COMMENT_MAX_LINKS:
+        return Comment.Status.REJECTED
+    duplicate = Comment.objects.using(PRIMARY).approved().filter(
+        news_id=comment.news_id,
+        author_id=comment.author_id,
+        text=comment.text,
+    ).exclude(pk=comment.pk)
+    if duplicate.exists():
+        return Comment.Status.REJECTED
+    return Comment.Status.APPROVED
+
+
+def moderate(comment):
+    """
+    Переводит комментарий из ожидания в итоговый статус.
+
+    Статус меняется условным UPDATE, поэтому при гонке воркера
+    и команды moderate_comments комментарий учтётся один раз.
+    """
+    status = check(comment)
+    with transaction.atomic():
+        updated = Comment.objects.filter(
+            pk=comment.pk, status=Comment.Status.PENDING
+        ).update(status=status)
+        if updated and status == Comment.Status.APPROVED:
+            touch_news(comment.news_id, 1)
+    if not updated:
+        # Комментарий уже промодерирован в другом потоке.
+        return None
+    comment.status = comment._saved_status = status
+    return status
+
+
+def schedule(comment):
+    """
+    Отправляет новый комментарий на модерацию.
+
+    Воркеры берут его только после фиксации транзакции, иначе
+    они могут не увидеть запись. При COMMENT_MODERATION_WORKERS = 0
+    модерация идёт прямо в запросе.
+    """
+    if not settings.COMMENT_MODERATION_WORKERS:
+        moderate(comment)
+        return
+    transaction.on_commit(
+        lambda: _get_executor().submit(_moderate_by_pk, comment.pk)
+    )
+
+
+def moderate_pending(batch_size=500):
+    """Модерирует накопившиеся комментарии пачками по batch_size."""
+    statuses = Counter()
+    last_pk = 0
+    while True:
+        batch = list(
+            Comment.objects.using(PRIMARY).filter(
+                status=Comment.Status.PENDING, pk__gt=last_pk
+            ).order_by('pk')[:batch_size]
+        )
+        if not batch:
+            return statuses
+        with transaction.atomic():
+            for comment in batch:
+                status = moderate(comment)
+                if status:
+                    statuses[status] += 1
+        last_pk = batch[-1].pk
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.COMMENT_MODERATION_WORKERS,
+                thread_name_prefix='moderation',
+            )
+    return _executor
+
+
+def _moderate_by_pk(pk):
+    try:
+        comment = Comment.objects.using(PRIMARY).filter(
+            pk=pk, status=Comment.Status.PENDING
+        ).first()
+        if comment is not None:
+            moderate(comment)
+    except Exception:
+        # Комментарий останется на модерации до moderate_comments.
+        logger.exception('Не удалось промодерировать комментарий %s', pk)
+    finally:
+        close_old_connections()
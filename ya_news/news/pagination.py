@@ -0,0 +1,63 @@
+import base64
+from collections import namedtuple
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+
+KeysetPage = namedtuple('KeysetPage', ('object_list', 'next_cursor'))
+
+
+def encode_cursor(value, pk):
+    """Упаковывает ключ последней записи страницы в строку для URL."""
+    raw = f'{value.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(field, cursor):
+    """Распаковывает курсор в значение поля сортировки и pk."""
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(cursor + padding).decode()
+        value, pk = raw.rsplit('|', 1)
+        return field.to_python(value), int(pk)
+    except (ValueError, ValidationError):
+        raise Http404('Некорректный курсор.')
+
+
+def after_cursor(queryset, field_name, cursor=None, descending=False):
+    """
+    Записи, следующие за курсором, упорядоченные по (field_name, pk).
+
+    Вместо OFFSET условие продолжает чтение индекса с последней записи
+    предыдущей страницы, поэтому глубокие страницы стоят столько же,
+    сколько первая.
+    """
+    sign, lookup = ('-', 'lt') if descending else ('', 'gt')
+    if cursor:
+        field = queryset.model._meta.get_field(field_name)
+        value, pk = decode_cursor(field, cursor)
+        # Первое условие даёт диапазон по индексу, второе
+        # отсекает уже показанные записи с тем же значением поля.
+        queryset = queryset.filter(
+            **{f'{field_name}__{lookup}e': value}
+        ).filter(
+            Q(**{f'{field_name}__{lookup}': value})
+            | Q(**{f'pk__{lookup}': pk})
+        )
+    return queryset.order_by(f'{sign}{field_name}', f'{sign}pk')
+
+
+def keyset_paginate(
+        queryset, field_name, cursor=None, per_page=10, descending=False
+):
+    """Возвращает страницу записей, следующих за курсором."""
+    objects = list(
+        after_cursor(queryset, field_name, cursor, descending)[:per_page + 1]
+    )
+    next_cursor = None
+    if len(objects) > per_page:
+        objects = objects[:per_page]
+        last = objects[-1]
+        next_cursor = encode_cursor(getattr(last, field_name), last.pk)
+    return KeysetPage(objects, next_cursor)
@@ -0,0 +1,131 @@
+import os
+import threading
+from collections import deque
+
+from django.conf import settings
+
+# Латиница и цифры, похожие на кириллицу: «рeдиcкa» и «нег0дяй»
+# находятся так же, как исходные слова.
+HOMOGLYPHS = str.maketrans({
+    'a': 'а', 'b': 'в', 'c': 'с', 'e': 'е', 'h': 'н', 'k': 'к', 'm': 'м',
+    'o': 'о', 'p': 'р', 't': 'т', 'x': 'х', 'y': 'у', 'ё': 'е',
+    '0': 'о', '3': 'з', '6': 'б', '@': 'а',
+})
+
+
+def normalize(text):
+    return text.lower().translate(HOMOGLYPHS)
+
+
+class Matcher:
+    """
+    Автомат Ахо — Корасик.
+
+    Строится один раз по списку слов и находит любое из них
+    за один проход по тексту, сколько бы слов ни было в списке.
+    """
+
+    def __init__(self, words):
+        self._goto = [{}]
+        self._fail = [0]
+        self._match = [None]
+        for word in words:
+            self._add(word)
+        self._link()
+
+    def _add(self, word):
+        normalized = normalize(word.strip())
+        if not normalized:
+            return
+        state = 0
+        for char in normalized:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._match.append(None)
+            state = next_state
+        if self._match[state] is None:
+            self._match[state] = word.strip()
+
+    def _link(self):
+        """Суффиксные ссылки строятся обходом бора в ширину."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                if self._match[next_state] is None:
+                    self._match[next_state] = self._match[
+                        self._fail[next_state]
+                    ]
+
+    def search(self, text):
+        """Первое найденное слово из списка или None."""
+        goto, fail, match = self._goto, self._fail, self._match
+        state = 0
+        for char in normalize(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if match[state] is not None:
+                return match[state]
+        return None
+
+
+def load_words(path):
+    """Слова из файла: по одному в строке, # начинает комментарий."""
+    words = []
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            word = line.split('#', 1)[0].strip()
+            if word:
+                words.append(word)
+    return words
+
+
+class ReloadableMatcher:
+    """
+    Автомат по файлу settings.BAD_WORDS_FILE.
+
+    Файл перечитывается при изменении, без перезапуска сервера.
+    Если файл не задан или не найден, используется default_words.
+    """
+
+    def __init__(self, default_words):
+        self.default_words = default_words
+        self._matcher = None
+        self._signature = None
+        self._lock = threading.Lock()
+
+    def search(self, text):
+        return self._current().search(text)
+
+    def _current(self):
+        path = getattr(settings, 'BAD_WORDS_FILE', None)
+        signature = (path, self._file_signature(path))
+        if self._matcher is None or signature != self._signature:
+            with self._lock:
+                if self._matcher is None or signature != self._signature:
+                    words = self.default_words
+                    if signature[1] is not None:
+                        words = load_words(path)
+                    self._matcher = Matcher(words)
+                    self._signature = signature
+        return self._matcher
+
+    @staticmethod
+    def _file_signature(path):
+        if not path:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
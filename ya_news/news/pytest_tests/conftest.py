@@ -2,6 +2,7 @@ from datetime import timedelta
 
 import pytest
 from django.conf import settings
+from django.core.cache import cache
 from django.urls import reverse
 from django.utils import timezone
 from django.test.client import Client
@@ -10,6 +11,12 @@ from news.forms import BAD_WORDS
 from news.models import News, Comment
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Кеш фрагментов не должен переживать откат базы между тестами."""
+    cache.clear()
+
+
 @pytest.fixture
 def bad_words_data():
     return {'text': f'Какой-то текст, {BAD_WORDS[0]}, еще текст'}
@@ -46,15 +53,18 @@ def comment(author, news):
 
 @pytest.fixture
 def comment_created(news, author):
+    """Десять комментариев с разными датами за четыре запроса к базе."""
     now = timezone.now()
-    for index in range(10):
-        comment = Comment.objects.create(
-            news=news,
-            author=author,
-            text=f'Текст {index}',
-        )
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Текст {index}')
+        for index in range(10)
+    )
+    comments = list(news.comment_set.order_by('pk'))
+    for index, comment in enumerate(comments):
         comment.created = now + timedelta(days=index)
-        comment.save()
+    # auto_now_add подменяет дату при вставке, поэтому — отдельным UPDATE.
+    Comment.objects.bulk_update(comments, ('created',))
+    News.objects.filter(pk=news.pk).recount_comments()
 
 
 @pytest.fixture
@@ -71,11 +81,31 @@ def home_url():
     return reverse('news:home')
 
 
+@pytest.fixture
+def archive_url():
+    return reverse('news:archive')
+
+
+@pytest.fixture
+def search_url():
+    return reverse('news:search')
+
+
 @pytest.fixture
 def detail_url(news):
     return reverse('news:detail', args=(news.id,))
 
 
+@pytest.fixture
+def comments_url(news):
+    return reverse('news:comments', args=(news.id,))
+
+
+@pytest.fixture
+def comment_feed_url(news):
+    return reverse('news:comment_feed', args=(news.id,))
+
+
 @pytest.fixture
 def edit_url(comment):
     return reverse('news:edit', args=(comment.id,))
@@ -1,6 +1,18 @@
+import json
+from datetime import datetime, timedelta
+
 import pytest
+from django.conf import settings
+from django.db import connection
+from django.template.base import Template
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
+from news.cache import stats
 from news.forms import CommentForm
+from news.models import Comment, News
+from yanews.middleware import ServerTimingMiddleware
 
 pytestmark = pytest.mark.django_db
 
@@ -60,3 +72,304 @@ def test_pages_contains_form_for_non_authorize_user(client, detail_url):
     """Тестирование не доступности формы комментария анонимному пользователю"""
     response = client.get(detail_url)
     assert 'form' not in response.context
+
+
+def test_archive_pages_cover_all_news(archive_url, client):
+    """
+    Архив по курсору выдаёт все новости без повторов,
+    в том числе с одинаковой датой.
+    """
+    per_page = settings.NEWS_COUNT_ON_HOME_PAGE
+    today = datetime.today()
+    News.objects.bulk_create(
+        News(
+            title=f'Новость {index}',
+            text='Текст',
+            date=today - timedelta(days=index // 3)
+        )
+        for index in range(per_page * 2 + 1)
+    )
+    seen = []
+    response = client.get(archive_url)
+    while True:
+        object_list = response.context['object_list']
+        assert len(object_list) <= per_page
+        seen.extend(object_list)
+        cursor = response.context['next_cursor']
+        if cursor is None:
+            break
+        response = client.get(archive_url, {'cursor': cursor})
+    expected = list(News.objects.order_by('-date', '-id'))
+    assert seen == expected
+
+
+def test_anonymous_detail_cache_hit_skips_comments(
+        client,
+        detail_url,
+        comment
+):
+    """Повторный анонимный запрос берёт комментарии из кеша."""
+    client.get(detail_url)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(detail_url)
+    assert comment.text in response.content.decode()
+    assert not any(
+        Comment._meta.db_table in query['sql']
+        for query in queries.captured_queries
+    )
+    assert stats() == {'hits': 1, 'misses': 1, 'ratio': 0.5}
+
+
+def test_fragment_cache_metrics(client, detail_url, comment):
+    """Сервер отдаёт свои счётчики кеша фрагментов только локально."""
+    url = settings.FRAGMENT_CACHE_METRICS_URL
+    client.get(detail_url)
+    client.get(detail_url)
+    response = client.get(url, {'reset': ''})
+    assert response.json() == {'hits': 1, 'misses': 1, 'ratio': 0.5}
+    assert 'no-store' in response['Cache-Control']
+    assert client.get(url).json()['misses'] == 0
+    assert client.get(url, REMOTE_ADDR='10.0.0.1').status_code == 404
+
+
+def test_comment_changes_invalidate_fragments(
+        client,
+        author,
+        detail_url,
+        home_url,
+        news
+):
+    """Новый комментарий сбрасывает кеш страницы новости и главной."""
+    client.get(detail_url)
+    client.get(home_url)
+    Comment.objects.create(news=news, author=author, text='Свежий')
+    assert 'Свежий' in client.get(detail_url).content.decode()
+    assert 'Комментариев: 1' in client.get(home_url).content.decode()
+
+
+def test_comments_are_loaded_in_batches(
+        client,
+        comment_created,
+        comments_url,
+        detail_url,
+        news,
+        settings
+):
+    """
+    Страница новости показывает первую порцию комментариев,
+    остальные отдаются по курсору.
+    """
+    settings.COMMENTS_PER_PAGE = 3
+    page = client.get(detail_url).context['comment_page']
+    seen = list(page.object_list)
+    assert len(seen) == settings.COMMENTS_PER_PAGE
+    while page.next_cursor:
+        page = client.get(
+            comments_url, {'cursor': page.next_cursor}
+        ).context['comment_page']
+        assert len(page.object_list) <= settings.COMMENTS_PER_PAGE
+        seen.extend(page.object_list)
+    assert seen == list(news.comment_set.order_by('created', 'id'))
+
+
+def test_search_ranks_and_highlights(client):
+    """
+    Поиск находит новости по словам, ставит совпадения в заголовке
+    выше и подсвечивает их, экранируя HTML.
+    """
+    in_text = News.objects.create(
+        title='Погода', text='<b>Котики</b> гуляют по крышам'
+    )
+    in_title = News.objects.create(title='Котики', text='Просто текст')
+    News.objects.create(title='Собаки', text='Ничего общего')
+    response = client.get(reverse('news:search'), {'q': 'котик'})
+    object_list = response.context['object_list']
+    assert object_list == [in_title, in_text]
+    assert object_list[0].title_html == '<mark>Котики</mark>'
+    assert '&lt;b&gt;<mark>Котики</mark>&lt;/b&gt;' in (
+        object_list[1].snippet_html
+    )
+
+
+def test_search_index_follows_changes(client, news):
+    """Индекс поиска обновляется при изменении и удалении новости."""
+    search_url = reverse('news:search')
+    news.text = 'Новый текст про ежей'
+    news.save()
+    assert client.get(
+        search_url, {'q': 'публикации'}
+    ).context['object_list'] == []
+    assert client.get(
+        search_url, {'q': 'ежей'}
+    ).context['object_list'] == [news]
+    news.delete()
+    assert client.get(
+        search_url, {'q': 'ежей'}
+    ).context['object_list'] == []
+
+
+@pytest.mark.django_db
+def test_server_timing_header(client, detail_url, settings):
+    """Server-Timing делит время на фазы и, по желанию, шаблоны."""
+    settings.SERVER_TIMING_TEMPLATES = True
+    header = client.get(detail_url)['Server-Timing']
+    phases = {metric.split(';')[0] for metric in header.split(', ')}
+    assert {'total', 'db', 'view', 'template', 'middleware'} <= phases
+    assert 'desc="news/detail.html"' in header
+    assert 'desc="includes/comments.html"' in header
+
+
+def test_template_timing_installed_only_when_enabled(monkeypatch, settings):
+    """Template._render подменяется только с SERVER_TIMING_TEMPLATES."""
+    render = getattr(Template._render, '__wrapped__', Template._render)
+    monkeypatch.setattr(Template, '_render', render)
+    settings.SERVER_TIMING_SAMPLE_RATE = 1.0
+    settings.SERVER_TIMING_TEMPLATES = False
+    ServerTimingMiddleware(lambda request: None)
+    assert Template._render is render
+    settings.SERVER_TIMING_TEMPLATES = True
+    ServerTimingMiddleware(lambda request: None)
+    ServerTimingMiddleware(lambda request: None)
+    assert Template._render.__wrapped__ is render
+
+
+@pytest.mark.django_db
+def test_server_timing_sampling(client, home_url, settings):
+    """Запросы вне выборки проходят без заголовка."""
+    settings.SERVER_TIMING_SAMPLE_RATE = 1e-12
+    assert 'Server-Timing' not in client.get(home_url)
+
+
+@pytest.mark.parametrize(
+    'url',
+    (pytest.lazy_fixture('home_url'), pytest.lazy_fixture('detail_url'))
+)
+def test_unchanged_page_not_modified(client, url, author, news, comment):
+    """
+    Неизменённая страница отвечает 304 без шаблонов и комментариев.
+
+    Новый комментарий меняет версию новости и вместе с ней ETag.
+    """
+    etag = client.get(url)['ETag']
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert not response.content
+    assert not any(
+        Comment._meta.db_table in query['sql']
+        for query in queries.captured_queries
+    )
+    Comment.objects.create(news=news, author=author, text='Свежий')
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response['ETag'] != etag
+
+
+def test_username_change_updates_page(client, detail_url, author, comment):
+    """
+    Новое имя автора комментария меняет ETag страницы новости.
+
+    Вход сохраняет только last_login и версию не трогает.
+    """
+    etag = client.get(detail_url)['ETag']
+    author.save(update_fields=['last_login'])
+    assert client.get(
+        detail_url, HTTP_IF_NONE_MATCH=etag
+    ).status_code == 304
+    author.username = 'Переименованный'
+    author.save()
+    response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert 'Переименованный' in response.content.decode()
+
+
+def test_etag_depends_on_user(
+        client,
+        user_client,
+        django_user_model,
+        detail_url
+):
+    """
+    Ссылки правки и форма комментария у каждого пользователя свои.
+
+    ETag авторизованного пользователя зависит и от его CSRF-cookie,
+    которая появляется после первого запроса.
+    """
+    reader_client = Client()
+    reader_client.force_login(
+        django_user_model.objects.create(username='Читатель')
+    )
+    for parametrized_client in (user_client, reader_client):
+        parametrized_client.get(detail_url)
+    etags = {
+        client.get(detail_url)['ETag'],
+        user_client.get(detail_url)['ETag'],
+        reader_client.get(detail_url)['ETag'],
+    }
+    assert len(etags) == 3
+    response = user_client.get(
+        detail_url, HTTP_IF_NONE_MATCH=user_client.get(detail_url)['ETag']
+    )
+    assert response.status_code == 304
+
+
+def read_feed(client, url, **params):
+    response = client.get(url, params)
+    assert response['Content-Type'] == 'application/json'
+    return json.loads(b''.join(response.streaming_content))
+
+
+def test_comment_feed_pages_by_cursor(
+        client,
+        author,
+        comment_created,
+        comment_feed_url,
+        news
+):
+    """
+    Лента отдаёт опубликованные комментарии в порядке Comment.Meta.ordering.
+
+    Только имя автора, текст и дата; остальное — по курсору.
+    """
+    Comment.objects.create(
+        news=news, author=author, text='На модерации',
+        status=Comment.Status.PENDING,
+    )
+    seen = []
+    params = {'limit': 3}
+    while True:
+        page = read_feed(client, comment_feed_url, **params)
+        assert len(page['comments']) <= 3
+        seen.extend(page['comments'])
+        if page['next_cursor'] is None:
+            break
+        params['cursor'] = page['next_cursor']
+    expected = news.comment_set.approved().order_by('created', 'id')
+    assert [item['text'] for item in seen] == [
+        comment.text for comment in expected
+    ]
+    assert set(seen[0]) == {'author', 'text', 'created'}
+    assert seen[0]['author'] == author.username
+
+
+def test_comment_feed_reads_rows_while_streaming(
+        client,
+        comment_created,
+        comment_feed_url
+):
+    """Строки ленты читаются при отдаче ответа, а не заранее списком."""
+    response = client.get(comment_feed_url)
+    with CaptureQueriesContext(connection) as queries:
+        b''.join(response.streaming_content)
+    assert len(queries) == 1
+
+
+def test_comment_feed_rejects_bad_requests(client, comment_feed_url):
+    """Нечисловой limit, испорченный курсор и несуществующая новость."""
+    assert client.get(comment_feed_url, {'limit': 'все'}).status_code == 400
+    assert client.get(
+        comment_feed_url, {'cursor': 'мусор'}
+    ).status_code == 404
+    assert client.get(
+        reverse('news:comment_feed', args=(0,))
+    ).status_code == 404
@@ -1,10 +1,22 @@
+import json
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
 from pytest_django.asserts import assertRedirects, assertFormError
 
 from news.forms import WARNING
-from news.models import Comment
+from news.management.commands import ingest_news
+from news.models import Comment, News
+from yanews.middleware import QueryBudgetMiddleware, stats
 
 
 @pytest.mark.django_db
@@ -109,3 +121,475 @@ def test_author_can_delete_comment(
     response = user_client.post(delete_url)
     assertRedirects(response, detail_url + '#comments')
     assert Comment.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_comment_count_follows_comments(
+        detail_url,
+        form_data,
+        news,
+        settings,
+        user_client
+):
+    """Счётчик комментариев меняется при публикации и удалении."""
+    settings.COMMENT_MODERATION_WORKERS = 0
+    user_client.post(detail_url, data=form_data)
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    comment = Comment.objects.get()
+    user_client.post(reverse('news:delete', args=(comment.id,)))
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+@pytest.mark.django_db
+def test_comment_count_survives_news_save_and_cascade(author, news):
+    """
+    Сохранение новости не затирает счётчик,
+    каскадное удаление комментариев его уменьшает.
+    """
+    stale_news = News.objects.get(pk=news.pk)
+    Comment.objects.create(news=news, author=author, text='Текст')
+    stale_news.title = 'Новый заголовок'
+    stale_news.save()
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    author.delete()
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+@pytest.mark.django_db
+def test_comment_count_ignores_uncounted_and_cascaded_comments(
+        author,
+        news
+):
+    """
+    Удаление неучтённого комментария не уводит счётчик ниже нуля,
+    а удаление новости не обновляет её счётчик на каждый комментарий.
+    """
+    raw = Comment(
+        news=news, author=author, text='Из loaddata', created=timezone.now()
+    )
+    raw.save_base(raw=True)
+    raw.delete()
+    news.refresh_from_db()
+    assert news.comment_count == 0
+    for index in range(3):
+        Comment.objects.create(news=news, author=author, text=f'Текст {index}')
+    with CaptureQueriesContext(connection) as queries:
+        news.delete()
+    assert not [
+        query for query in queries
+        if query['sql'].startswith('UPDATE "news_news"')
+    ]
+    assert not Comment.objects.exists()
+
+
+@pytest.mark.django_db
+def test_moved_comment_updates_both_news(author, comment, news):
+    """Перенос комментария меняет счётчики прежней и новой новости."""
+    other = News.objects.create(title='Другая', text='Текст')
+    comment = Comment.objects.get(pk=comment.pk)
+    comment.news = other
+    comment.save()
+    news.refresh_from_db()
+    other.refresh_from_db()
+    assert (news.comment_count, other.comment_count) == (0, 1)
+
+
+@pytest.mark.django_db
+def test_recount_comments_command(author, news):
+    """Команда восстанавливает счётчики после массовой загрузки."""
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Текст {index}')
+        for index in range(3)
+    )
+    news.refresh_from_db()
+    assert news.comment_count == 0
+    call_command('recount_comments', stdout=StringIO())
+    news.refresh_from_db()
+    assert news.comment_count == 3
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'url, expected_queries',
+    (
+        # Сессия берётся из кеша. Пользователь, новость, SAVEPOINT,
+        # INSERT, RELEASE SAVEPOINT. Модерация идёт после фиксации
+        # транзакции.
+        (pytest.lazy_fixture('detail_url'), 5),
+        # Пользователь, комментарий с новостью, SAVEPOINT, UPDATE
+        # комментария, версия новости, RELEASE SAVEPOINT.
+        (pytest.lazy_fixture('edit_url'), 6),
+        # Пользователь, комментарий с новостью, DELETE, счётчик в новости.
+        (pytest.lazy_fixture('delete_url'), 4),
+    )
+)
+def test_comment_write_query_count(
+        django_assert_num_queries,
+        form_data,
+        url,
+        expected_queries,
+        user_client
+):
+    """Запись комментария не перечитывает уже загруженные объекты."""
+    with django_assert_num_queries(expected_queries):
+        response = user_client.post(url, data={'text': form_data['text']})
+    assert response.status_code == HTTPStatus.FOUND
+
+
+@pytest.mark.django_db
+def test_user_cant_disguise_bad_words(detail_url, user_client):
+    """Замена букв похожими латинскими не помогает обойти фильтр."""
+    response = user_client.post(detail_url, data={'text': 'Ты pедиcкa!'})
+    assertFormError(response, 'form', 'text', errors=WARNING)
+    assert Comment.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_bad_words_file_is_reloaded(
+        detail_url,
+        settings,
+        tmp_path,
+        user_client
+):
+    """Список слов перечитывается из файла после его изменения."""
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('# словарь\nкапуста\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = str(words_file)
+    response = user_client.post(detail_url, data={'text': 'Капуста!'})
+    assertFormError(response, 'form', 'text', errors=WARNING)
+    words_file.write_text('морковка\n', encoding='utf-8')
+    response = user_client.post(detail_url, data={'text': 'Капуста!'})
+    assertRedirects(response, f'{detail_url}#comments')
+    assert Comment.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_new_comment_waits_for_moderation(
+        detail_url,
+        form_data,
+        news,
+        user_client
+):
+    """
+    Комментарий принимается на модерацию и появляется
+    на странице только после неё.
+    """
+    user_client.post(detail_url, data=form_data)
+    comment = Comment.objects.get()
+    assert comment.status == Comment.Status.PENDING
+    response = user_client.get(detail_url)
+    assert comment not in response.context['comment_page'].object_list
+    call_command('moderate_comments', stdout=StringIO())
+    comment.refresh_from_db()
+    news.refresh_from_db()
+    assert comment.status == Comment.Status.APPROVED
+    assert news.comment_count == 1
+    response = user_client.get(detail_url)
+    assert comment in response.context['comment_page'].object_list
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'text',
+    (
+        'Текст комментария',
+        'http://a.example http://b.example http://c.example',
+    )
+)
+def test_moderation_rejects_duplicates_and_links(
+        author,
+        comment,
+        news,
+        text
+):
+    """Модерация отклоняет повторы и комментарии со ссылками."""
+    pending = Comment.objects.create(
+        news=news,
+        author=author,
+        text=text,
+        status=Comment.Status.PENDING
+    )
+    call_command('moderate_comments', stdout=StringIO())
+    pending.refresh_from_db()
+    news.refresh_from_db()
+    assert pending.status == Comment.Status.REJECTED
+    assert news.comment_count == 1
+
+
+@pytest.mark.django_db
+def test_edited_comment_is_moderated_again(
+        comment,
+        edit_url,
+        news,
+        settings,
+        user_client
+):
+    """Одобренный комментарий после правки снова проходит модерацию."""
+    settings.COMMENT_MODERATION_WORKERS = 0
+    call_command('moderate_comments', stdout=StringIO())
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    user_client.post(edit_url, data={
+        'text': 'http://a.example http://b.example http://c.example'
+    })
+    comment.refresh_from_db()
+    news.refresh_from_db()
+    assert comment.status == Comment.Status.REJECTED
+    assert news.comment_count == 0
+
+
+@pytest.mark.django_db
+def test_ingest_news_reads_json_array():
+    """Фикстура-массив загружается потоково, по маленьким пачкам."""
+    fixture = settings.BASE_DIR / 'news' / 'fixtures' / 'news.json'
+    call_command(
+        'ingest_news', str(fixture), batch_size=2, stdout=StringIO()
+    )
+    assert News.objects.count() == len(json.loads(fixture.read_text()))
+
+
+@pytest.mark.django_db
+def test_ingest_news_reads_ndjson(tmp_path, author):
+    """Комментарии получают авторов по имени, даты и счётчики."""
+    records = [
+        {'model': 'news.news', 'pk': 7,
+         'fields': {'title': 'Заголовок', 'text': 'Текст'}},
+        {'model': 'news.comment', 'fields': {
+            'news': 7, 'author': author.username, 'text': 'Первый',
+            'created': '2022-01-01T10:00:00Z'}},
+        {'model': 'news.comment', 'fields': {
+            'news': 7, 'author': 'Новичок', 'text': 'Второй'}},
+    ]
+    path = tmp_path / 'news.ndjson'
+    path.write_text('\n'.join(json.dumps(record) for record in records))
+    call_command(
+        'ingest_news', str(path), create_authors=True, stdout=StringIO()
+    )
+    news = News.objects.get(pk=7)
+    assert news.comment_count == 2
+    first = news.comment_set.get(text='Первый')
+    assert first.author == author
+    assert first.created.year == 2022
+    assert news.comment_set.get(text='Второй').author.username == 'Новичок'
+
+
+@pytest.mark.django_db
+def test_ingest_news_splits_lookups(tmp_path, author, monkeypatch):
+    """
+    Поиск авторов и пересчёт новостей идут порциями, а дата
+    комментария берётся из входа только на время вставки.
+    """
+    monkeypatch.setattr(ingest_news, 'MAX_IN_VALUES', 2)
+    records = [
+        {'model': 'news.news', 'pk': pk,
+         'fields': {'title': f'Новость {pk}', 'text': 'Текст'}}
+        for pk in range(1, 6)
+    ] + [
+        {'model': 'news.comment', 'fields': {
+            'news': pk, 'author': f'Автор {pk}', 'text': 'Текст',
+            'created': '2022-01-01T10:00:00Z'}}
+        for pk in range(1, 6)
+    ]
+    path = tmp_path / 'news.ndjson'
+    path.write_text('\n'.join(json.dumps(record) for record in records))
+    # Авторов в пачке больше, чем мест в кеше.
+    call_command(
+        'ingest_news', str(path), create_authors=True, author_cache_size=1,
+        stdout=StringIO()
+    )
+    assert set(
+        News.objects.values_list('comment_count', flat=True)
+    ) == {1}
+    assert Comment._meta.get_field('created').auto_now_add
+    assert Comment.objects.create(
+        news_id=1, author=author, text='Новый'
+    ).created.year > 2022
+    with pytest.raises(CommandError):
+        call_command('ingest_news', str(path), progress_every=0)
+
+
+@pytest.mark.django_db
+def test_ingest_news_reports_json_errors_early(tmp_path, monkeypatch):
+    """
+    Записи длиннее фрагмента чтения разбираются, а ошибка в середине
+    массива сообщается сразу, без дочитывания файла.
+    """
+    monkeypatch.setattr(ingest_news, 'CHUNK_SIZE', 16)
+    records = [
+        {'model': 'news.news',
+         'fields': {'title': f'Новость {index}', 'text': 'Текст ' * 10}}
+        for index in range(3)
+    ]
+    path = tmp_path / 'news.json'
+    path.write_text(json.dumps(records, ensure_ascii=False))
+    call_command('ingest_news', str(path), stdout=StringIO())
+    assert News.objects.count() == 3
+    text = json.dumps(records[:1])[:-1] + ', {"model": oops}, '
+    path.write_text(text + json.dumps(records * 100)[1:])
+    with pytest.raises(CommandError, match='Expecting value'):
+        call_command('ingest_news', str(path), stdout=StringIO())
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bench_http_saves_and_compares_baseline(settings, tmp_path):
+    """Нагрузочный прогон на сгенерированных данных пишет замер."""
+    # Общая база в памяти не ждёт блокировок: без фоновых потоков.
+    settings.COMMENT_MODERATION_WORKERS = 0
+    call_command(
+        'generate_data', users=2, news=3, comments_per_news=2,
+        stdout=StringIO()
+    )
+    assert Comment.objects.count() == 6
+    assert set(News.objects.values_list('comment_count', flat=True)) == {2}
+    baseline = tmp_path / 'baseline.json'
+    call_command(
+        'bench_http', requests=4, concurrency=1, save=str(baseline),
+        stdout=StringIO()
+    )
+    scenarios = json.loads(baseline.read_text())['scenarios']
+    assert set(scenarios) == {'home', 'detail', 'comment'}
+    assert all(result['errors'] == 0 for result in scenarios.values())
+    output = StringIO()
+    call_command(
+        'bench_http', requests=4, concurrency=1, compare=str(baseline),
+        scenarios='home', stdout=output
+    )
+    assert 'p95' in output.getvalue()
+
+
+@pytest.mark.django_db
+def test_query_budget_flags_n_plus_one(rf, settings, caplog):
+    """Счётчик комментариев в цикле по новостям отмечается как N+1."""
+    settings.QUERY_BUDGETS = {'news:home': {'GET': 3}}
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст') for index in range(5)
+    )
+
+    def home_with_n_plus_one(request):
+        for news in News.objects.all():
+            news.comment_set.count()
+        return HttpResponse()
+
+    request = rf.get('/')
+    request.resolver_match = resolve('/')
+    stats.reset()
+    QueryBudgetMiddleware(home_with_n_plus_one)(request)
+    home = stats.snapshot()['news:home']
+    assert home['max_queries'] == 6
+    assert home['over_budget'] == 1
+    assert len(home['n_plus_one']) == 1
+    assert 'N+1' in caplog.text
+
+
+@pytest.mark.django_db
+def test_query_metrics_endpoint(client, home_url):
+    """Сводка доступна только с локального адреса."""
+    client.get(f'{settings.QUERY_METRICS_URL}?reset')
+    client.get(home_url)
+    metrics = client.get(settings.QUERY_METRICS_URL).json()
+    assert metrics['news:home']['requests'] == 1
+    response = client.get(
+        settings.QUERY_METRICS_URL, REMOTE_ADDR='10.0.0.1'
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_session_and_user_come_from_cache(user_client, detail_url):
+    """Повторный запрос не читает сессию и пользователя из базы."""
+    user_client.get(detail_url)
+    with CaptureQueriesContext(connection) as queries:
+        user_client.get(detail_url)
+    assert not any(
+        f'FROM "{table}"' in query['sql']
+        for query in queries.captured_queries
+        for table in ('django_session', 'auth_user')
+    )
+
+
+@pytest.mark.django_db
+def test_password_change_invalidates_cached_user(
+        author,
+        user_client,
+        detail_url
+):
+    """После смены пароля старая сессия сразу перестаёт действовать."""
+    assert user_client.get(detail_url).context['user'] == author
+    author.set_password('Новый пароль')
+    author.save()
+    user = user_client.get(detail_url).context['user']
+    assert not user.is_authenticated
+
+
+@pytest.mark.django_db
+def test_logout_invalidates_session_copies(
+        user_client,
+        detail_url,
+        logout_url
+):
+    """Копия cookie сессии после выхода не авторизует."""
+    user_client.get(detail_url)
+    copy = Client()
+    session_cookie = user_client.cookies[settings.SESSION_COOKIE_NAME]
+    copy.cookies[settings.SESSION_COOKIE_NAME] = session_cookie.value
+    user_client.get(logout_url)
+    assert not copy.get(detail_url).context['user'].is_authenticated
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bench_auth_reports_fewer_queries(settings, author, news):
+    """Сессия и пользователь из кеша экономят запросы к базе."""
+    output = StringIO()
+    call_command('bench_auth', requests=4, concurrency=1, stdout=output)
+    queries = {
+        line.split()[0]: float(line.split()[-1])
+        for line in output.getvalue().splitlines()[1:]
+    }
+    assert queries['cached'] < queries['db']
+    assert queries['signed'] < queries['db']
+
+
+@pytest.mark.django_db
+def test_export_static_is_incremental(tmp_path, author, news, comment):
+    """Повторный экспорт перерисовывает только изменившиеся страницы."""
+    other = News.objects.create(title='Другая новость', text='Текст')
+    output = StringIO()
+    call_command('export_static', str(tmp_path), stdout=output)
+    assert 'Страниц: 4, перерисовано: 4' in output.getvalue()
+    detail = tmp_path / 'news' / str(news.pk) / 'index.html'
+    assert comment.text in detail.read_text(encoding='utf-8')
+    manifest = json.loads((tmp_path / 'manifest.json').read_text())
+    assert set(manifest) == {
+        reverse('news:home'),
+        reverse('news:archive'),
+        reverse('news:detail', args=(news.pk,)),
+        reverse('news:detail', args=(other.pk,)),
+    }
+    Comment.objects.create(news=news, author=author, text='Свежий')
+    output = StringIO()
+    call_command('export_static', str(tmp_path), stdout=output)
+    # Страница новости, главная и архив со счётчиком комментариев.
+    assert 'перерисовано: 3' in output.getvalue()
+    assert 'Свежий' in detail.read_text(encoding='utf-8')
+    other.delete()
+    output = StringIO()
+    call_command('export_static', str(tmp_path), stdout=output)
+    assert 'удалено: 1' in output.getvalue()
+    assert not (tmp_path / 'news' / str(other.pk)).exists()
+
+
+@pytest.mark.django_db
+def test_bench_comment_feed_reads_all_comments(settings, comment_created):
+    """Замер читает все порции HTML и JSON одной новости."""
+    settings.COMMENTS_PER_PAGE = 3
+    output = StringIO()
+    call_command('bench_comment_feed', rounds=1, stdout=output)
+    lines = output.getvalue().splitlines()
+    assert 'комментариев: 10' in lines[0]
+    sizes = {line.split()[0]: int(line.split()[1]) for line in lines[2:]}
+    assert set(sizes) == {'html', 'json'}
+    assert sizes['json'] < sizes['html']
@@ -0,0 +1,110 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import sleep
+
+import pytest
+from django.db import connection
+from django.http import HttpResponse
+from django.test.utils import CaptureQueriesContext
+
+from yanews.microcache import MicroCache
+
+THREADS = 32
+
+
+def slow_render(calls, delay=0.2):
+    """Медленная страница: считает, сколько раз её рендерили."""
+    lock = threading.Lock()
+
+    def render():
+        with lock:
+            calls.append(1)
+        sleep(delay)
+        return HttpResponse(f'Страница {len(calls)}')
+
+    return render
+
+
+def fetch_concurrently(cache, render):
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        return list(executor.map(
+            lambda _: cache.fetch('/news/1/', render), range(THREADS)
+        ))
+
+
+def test_cold_page_is_rendered_once():
+    """
+    Одновременные промахи по одному ключу рендерят страницу один раз.
+
+    32 потока запрашивают холодную страницу, которая рендерится
+    0,2 с: один поток рендерит, остальные ждут его и получают готовый
+    ответ из кеша.
+    """
+    cache = MicroCache(
+        max_bytes=1024 * 1024, ttl=60, stale_ttl=60, wait_timeout=5
+    )
+    calls = []
+    results = fetch_concurrently(cache, slow_render(calls))
+    assert len(calls) == 1
+    states = [state for _, state in results]
+    assert states.count('MISS') == 1
+    assert states.count('HIT') == THREADS - 1
+    assert {response.content for response, _ in results} == {
+        'Страница 1'.encode()
+    }
+    stats = cache.stats()
+    assert stats['misses'] == 1
+    assert stats['waits'] + stats['hits'] >= THREADS - 1
+
+
+def test_expired_page_is_served_stale_while_rendering():
+    """После TTL один поток обновляет страницу, остальные берут старую."""
+    cache = MicroCache(
+        max_bytes=1024 * 1024, ttl=0.05, stale_ttl=60, wait_timeout=5
+    )
+    calls = []
+    render = slow_render(calls)
+    cache.fetch('/news/1/', render)
+    sleep(0.1)
+    results = fetch_concurrently(cache, render)
+    assert len(calls) == 2
+    states = [state for _, state in results]
+    assert states.count('MISS') == 1
+    assert states.count('STALE') == THREADS - 1
+    assert cache.fetch('/news/1/', render)[1] == 'HIT'
+
+
+def test_lru_keeps_byte_budget():
+    """Старые ответы вытесняются, когда кеш превышает лимит в байтах."""
+    cache = MicroCache(max_bytes=300, ttl=60, stale_ttl=0, wait_timeout=5)
+    for path in ('/a/', '/b/', '/c/'):
+        cache.fetch(path, lambda: HttpResponse(b'x' * 100))
+    cache.fetch('/a/', lambda: HttpResponse(b'x' * 100))
+    stats = cache.stats()
+    assert stats['evictions'] >= 1
+    assert stats['bytes'] <= 300
+    # /a/ прочитан последним и остался, вытеснен /b/.
+    assert cache.fetch('/a/', lambda: HttpResponse())[1] == 'HIT'
+    assert cache.fetch('/b/', lambda: HttpResponse())[1] == 'MISS'
+
+
+@pytest.fixture
+def microcache(settings):
+    settings.MICROCACHE_TTL = 60
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('microcache')
+def test_anonymous_get_is_cached(client, user_client, detail_url, settings):
+    """Повторный анонимный запрос не доходит до базы и шаблонов."""
+    assert client.get(detail_url)['X-Microcache'] == 'MISS'
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(detail_url)
+    assert response['X-Microcache'] == 'HIT'
+    assert len(queries) == 0
+    response = client.get(detail_url, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert response.status_code == 304
+    assert 'X-Microcache' not in user_client.get(detail_url)
+    stats = client.get(settings.MICROCACHE_METRICS_URL).json()
+    assert stats['misses'] == 1
+    assert stats['hits'] == 2
@@ -0,0 +1,155 @@
+import os
+
+import pytest
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver
+
+from news.models import Comment, News
+
+pytestmark = pytest.mark.django_db
+
+# QUERY_BUDGETS_REPORT=1 pytest -s -k budget печатает текущее число
+# запросов каждого маршрута и не падает на превышении бюджета.
+REPORT = bool(os.environ.get('QUERY_BUDGETS_REPORT'))
+
+CLIENT = pytest.lazy_fixture('client')
+USER_CLIENT = pytest.lazy_fixture('user_client')
+DETAIL_URL = pytest.lazy_fixture('detail_url')
+EDIT_URL = pytest.lazy_fixture('edit_url')
+DELETE_URL = pytest.lazy_fixture('delete_url')
+LOGIN_URL = pytest.lazy_fixture('login_url')
+COMMENT_FEED_URL = pytest.lazy_fixture('comment_feed_url')
+SIGNUP_URL = pytest.lazy_fixture('signup_url')
+
+# Страницы проверяются авторизованным пользователем: у него к каждому
+# запросу добавляются сессия и пользователь.
+ROUTES = (
+    ('news:home', 'GET', pytest.lazy_fixture('home_url'), USER_CLIENT, None),
+    (
+        'news:archive', 'GET', pytest.lazy_fixture('archive_url'),
+        USER_CLIENT, None
+    ),
+    (
+        'news:search', 'GET', pytest.lazy_fixture('search_url'),
+        USER_CLIENT, {'q': 'Заголовок'}
+    ),
+    ('news:detail', 'GET', DETAIL_URL, USER_CLIENT, None),
+    ('news:detail', 'POST', DETAIL_URL, USER_CLIENT, {'text': 'Новый'}),
+    (
+        'news:comments', 'GET', pytest.lazy_fixture('comments_url'),
+        USER_CLIENT, None
+    ),
+    ('news:comment_feed', 'GET', COMMENT_FEED_URL, USER_CLIENT, None),
+    ('news:edit', 'GET', EDIT_URL, USER_CLIENT, None),
+    ('news:edit', 'POST', EDIT_URL, USER_CLIENT, {'text': 'Новый текст'}),
+    ('news:delete', 'GET', DELETE_URL, USER_CLIENT, None),
+    ('news:delete', 'POST', DELETE_URL, USER_CLIENT, None),
+    ('users:login', 'GET', LOGIN_URL, CLIENT, None),
+    (
+        'users:login', 'POST', LOGIN_URL, CLIENT,
+        pytest.lazy_fixture('login_data')
+    ),
+    (
+        'users:logout', 'GET', pytest.lazy_fixture('logout_url'),
+        USER_CLIENT, None
+    ),
+    ('users:signup', 'GET', SIGNUP_URL, CLIENT, None),
+    (
+        'users:signup', 'POST', SIGNUP_URL, CLIENT,
+        {
+            'username': 'Новичок',
+            'password1': 'Пароль-новичка',
+            'password2': 'Пароль-новичка',
+        }
+    ),
+)
+
+
+@pytest.fixture
+def login_data(author):
+    author.set_password('Пароль-автора')
+    author.save()
+    return {'username': author.username, 'password': 'Пароль-автора'}
+
+
+def count_queries(client, method, url, data=None):
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method.lower())(url, data)
+        # Потоковый ответ читает базу, пока его отдают.
+        if response.streaming:
+            b''.join(response.streaming_content)
+    return len(context)
+
+
+def test_every_route_has_budget():
+    """У каждого маршрута news и users есть бюджет, и он проверяется."""
+    names = set()
+    for namespace in ('news', 'users'):
+        _, resolver = get_resolver().namespace_dict[namespace]
+        names |= {
+            f'{namespace}:{name}'
+            for name in resolver.reverse_dict if isinstance(name, str)
+        }
+    assert names == set(settings.QUERY_BUDGETS)
+    checked = {(name, method) for name, method, *_ in ROUTES}
+    assert checked == {
+        (name, method)
+        for name, methods in settings.QUERY_BUDGETS.items()
+        for method in methods
+    }
+
+
+@pytest.mark.parametrize(
+    'name, method, url, parametrized_client, data', ROUTES
+)
+def test_query_budget(name, method, url, parametrized_client, data):
+    """Число запросов к базе не превышает бюджет маршрута."""
+    count = count_queries(parametrized_client, method, url, data)
+    budget = settings.QUERY_BUDGETS[name][method]
+    if REPORT:
+        print(f'\n{name} {method}: {count} (бюджет {budget})')
+        return
+    assert count <= budget, f'{name} {method}: {count} > {budget}'
+
+
+def add_news(total):
+    News.objects.bulk_create(
+        News(title=f'Заголовок {index}', text='Текст')
+        for index in range(News.objects.count(), total)
+    )
+
+
+def add_comments(news, author):
+    def seed(total):
+        Comment.objects.bulk_create(
+            Comment(news=news, author=author, text=f'Комментарий {index}')
+            for index in range(news.comment_set.count(), total)
+        )
+    return seed
+
+
+@pytest.mark.parametrize(
+    'url, data, related',
+    (
+        (pytest.lazy_fixture('home_url'), None, 'news'),
+        (pytest.lazy_fixture('archive_url'), None, 'news'),
+        (pytest.lazy_fixture('search_url'), {'q': 'Заголовок'}, 'news'),
+        (DETAIL_URL, None, 'comments'),
+        (pytest.lazy_fixture('comments_url'), None, 'comments'),
+        (COMMENT_FEED_URL, None, 'comments'),
+    )
+)
+def test_queries_do_not_grow_with_data(
+        url, data, related, user_client, news, author
+):
+    """Страница с 1, 10 и 1000 объектами делает одно число запросов."""
+    seed = add_news if related == 'news' else add_comments(news, author)
+    counts = []
+    for total in (1, 10, 1000):
+        seed(total)
+        cache.clear()
+        counts.append(count_queries(user_client, 'GET', url, data))
+    assert len(set(counts)) == 1, counts
@@ -0,0 +1,84 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from news.models import Comment, News
+
+# Те же признаки плохого плана проверяет
+# ya_note/notes/tests/test_query_plans.py: проекты тестируются
+# отдельно и общих модулей не имеют.
+# «SCAN таблица» (до SQLite 3.36 — «SCAN TABLE таблица») без индекса —
+# полный проход по таблице.
+FULL_SCAN_RE = re.compile(r'\bSCAN (TABLE )?\w+$')
+TEMP_B_TREE = 'USE TEMP B-TREE'
+
+
+def query_plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+@pytest.fixture
+def seeded(author, news, comment):
+    """Новости с комментариями, чтобы план строился не по пустым таблицам."""
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст') for index in range(50)
+    )
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Комментарий {index}')
+        for index in range(50)
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('seeded')
+@pytest.mark.parametrize(
+    'url, parametrized_client',
+    (
+        # NewsList.get_queryset.
+        (pytest.lazy_fixture('home_url'), pytest.lazy_fixture('client')),
+        (pytest.lazy_fixture('archive_url'), pytest.lazy_fixture('client')),
+        # NewsDetail.get_object и страница комментариев.
+        (pytest.lazy_fixture('detail_url'), pytest.lazy_fixture('client')),
+        (pytest.lazy_fixture('comments_url'), pytest.lazy_fixture('client')),
+        (
+            pytest.lazy_fixture('comment_feed_url'),
+            pytest.lazy_fixture('client')
+        ),
+        # CommentBase.get_queryset.
+        (
+            pytest.lazy_fixture('edit_url'),
+            pytest.lazy_fixture('user_client')
+        ),
+        (
+            pytest.lazy_fixture('delete_url'),
+            pytest.lazy_fixture('user_client')
+        ),
+    )
+)
+def test_hot_queries_use_indexes(url, parametrized_client):
+    """
+    Запросы горячих страниц читают таблицы по индексам.
+
+    Каждый SELECT проверяется через EXPLAIN QUERY PLAN: ни полного
+    прохода по таблице, ни сортировки во временном B-дереве.
+    """
+    with CaptureQueriesContext(connection) as context:
+        response = parametrized_client.get(url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+    selects = [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith('SELECT')
+    ]
+    assert selects
+    for sql in selects:
+        plan = query_plan(sql)
+        problems = [
+            step for step in plan
+            if FULL_SCAN_RE.search(step) or TEMP_B_TREE in step
+        ]
+        assert not problems, '\n'.join([sql, *plan])
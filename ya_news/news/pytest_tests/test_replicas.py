@@ -0,0 +1,91 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.core.management import call_command
+from django.db import connections
+from django.test.client import Client
+
+from news import moderation
+from news.models import Comment, News
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+COMMENT_TEXT = 'Свежий комментарий'
+
+
+@pytest.fixture
+def replica(transactional_db, settings, tmp_path):
+    """
+    Реплика — отдельный файл SQLite, который не догоняет основную базу.
+
+    Всё, что записано в основную базу, в реплике не появляется.
+    """
+    connections.databases['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': str(tmp_path / 'replica.sqlite3'),
+    }
+    settings.DATABASE_REPLICAS = ['replica']
+    call_command('migrate', database='replica', verbosity=0)
+    # Общая база в памяти не ждёт блокировок: без фоновых потоков.
+    settings.COMMENT_MODERATION_WORKERS = 0
+    yield 'replica'
+    connections['replica'].close()
+    del connections['replica']
+    del connections.databases['replica']
+
+
+@pytest.fixture(autouse=True)
+def replicated_news(replica, news):
+    News.objects.using(replica).create(
+        pk=news.pk, title=news.title, text=news.text
+    )
+    return news
+
+
+def test_reads_go_to_replica(client, detail_url):
+    """Анонимное чтение идёт в реплику и не видит новых записей."""
+    News.objects.filter(title='Заголовок').update(title='Новый заголовок')
+    response = client.get(detail_url)
+    assert response.status_code == 200
+    assert 'Новый заголовок' not in response.content.decode()
+    assert 'primary_db' not in response.cookies
+
+
+def test_author_reads_own_write(user_client, detail_url):
+    """После записи автор видит свой комментарий, остальные — реплику."""
+    response = user_client.post(detail_url, {'text': COMMENT_TEXT})
+    assert response.status_code == 302
+    assert 'primary_db' in response.cookies
+    assert Comment.objects.using('default').filter(text=COMMENT_TEXT).exists()
+    assert not Comment.objects.using('replica').exists()
+    assert COMMENT_TEXT in user_client.get(detail_url).content.decode()
+    assert COMMENT_TEXT not in Client().get(detail_url).content.decode()
+
+
+def test_stickiness_expires(settings, user_client, detail_url):
+    """По истечении REPLICA_STICKY_SECONDS чтение возвращается в реплику."""
+    user_client.post(detail_url, {'text': COMMENT_TEXT})
+    settings.REPLICA_STICKY_SECONDS = 0
+    assert COMMENT_TEXT not in user_client.get(detail_url).content.decode()
+
+
+def test_author_reads_own_write_in_feed(
+        user_client, detail_url, comment_feed_url
+):
+    """Лента читается в представлении, пока автор закреплён за основной."""
+    user_client.post(detail_url, {'text': COMMENT_TEXT})
+    response = user_client.get(comment_feed_url)
+    assert COMMENT_TEXT in b''.join(response.streaming_content).decode()
+
+
+def test_moderation_worker_reads_primary(
+        monkeypatch, settings, user_client, detail_url
+):
+    """Фоновая модерация находит комментарий, которого нет в реплике."""
+    settings.COMMENT_MODERATION_WORKERS = 1
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(moderation, '_executor', executor)
+    user_client.post(detail_url, {'text': COMMENT_TEXT})
+    executor.shutdown(wait=True)
+    comment = Comment.objects.using('default').get(text=COMMENT_TEXT)
+    assert comment.status == Comment.Status.APPROVED
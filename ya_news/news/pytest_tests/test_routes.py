@@ -6,7 +6,10 @@ from pytest_django.asserts import assertRedirects
 pytestmark = pytest.mark.django_db
 
 HOME_URL = pytest.lazy_fixture('home_url')
+ARCHIVE_URL = pytest.lazy_fixture('archive_url')
+SEARCH_URL = pytest.lazy_fixture('search_url')
 DETAIL_URL = pytest.lazy_fixture('detail_url')
+COMMENTS_URL = pytest.lazy_fixture('comments_url')
 EDIT_URL = pytest.lazy_fixture('edit_url')
 DELETE_URL = pytest.lazy_fixture('delete_url')
 LOGIN_URL = pytest.lazy_fixture('login_url')
@@ -16,7 +19,10 @@ SIGNUP_URL = pytest.lazy_fixture('signup_url')
 
 @pytest.mark.parametrize(
     'url',
-    (HOME_URL, LOGIN_URL, LOGOUT_URL, SIGNUP_URL, DETAIL_URL)
+    (
+        HOME_URL, ARCHIVE_URL, SEARCH_URL, LOGIN_URL, LOGOUT_URL,
+        SIGNUP_URL, DETAIL_URL, COMMENTS_URL
+    )
 )
 def test_pages_availability_for_anonymous_user(client, url):
     """
@@ -63,3 +69,13 @@ def test_redirect_for_anonymous_client(client, name, login_url):
     expected_url = f'{login_url}?next={name}'
     response = client.get(name)
     assertRedirects(response, expected_url)
+
+
+@pytest.mark.parametrize(
+    'url',
+    (ARCHIVE_URL, COMMENTS_URL),
+)
+def test_invalid_cursor(client, url):
+    """Некорректный курсор даёт 404."""
+    response = client.get(url, {'cursor': 'мусор'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,107 @@
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import News
+
+FTS_TABLE = 'news_news_fts'
+
+# Те же триггеры, что в миграции 0006_news_fts. SQLite-бэкенд Django
+# пересоздаёт таблицу при AddField/AlterField, и триггеры на ней
+# пропадают, поэтому после каждого migrate они ставятся заново.
+TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS news_news_fts_insert
+    AFTER INSERT ON news_news BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS news_news_fts_delete
+    AFTER DELETE ON news_news BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS news_news_fts_update
+    AFTER UPDATE OF title, text ON news_news BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+)
+
+# Управляющие символы не встречаются в тексте новостей и
+# переживают экранирование HTML, после которого становятся <mark>.
+MARK_START, MARK_END = '\x02', '\x03'
+
+SEARCH_SQL = f"""
+    SELECT
+        news_news.id,
+        news_news.date,
+        news_news.comment_count,
+        highlight({FTS_TABLE}, 0, %s, %s) AS title_html,
+        snippet({FTS_TABLE}, 1, %s, %s, '…', 24) AS snippet_html
+    FROM {FTS_TABLE}
+    JOIN news_news ON news_news.id = {FTS_TABLE}.rowid
+    WHERE {FTS_TABLE} MATCH %s
+    ORDER BY bm25({FTS_TABLE}, 10.0, 1.0)
+    LIMIT %s
+"""
+
+WORD_RE = re.compile(r'\w+')
+
+
+def ensure_triggers(using=DEFAULT_DB_ALIAS, **kwargs):
+    """Восстанавливает триггеры индекса, если таблица поиска есть."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        if FTS_TABLE not in connection.introspection.table_names(cursor):
+            return
+        for sql in TRIGGERS:
+            cursor.execute(sql)
+
+
+def build_match(query):
+    """
+    Запрос FTS5 из пользовательской строки.
+
+    Каждое слово берётся в кавычки, чтобы синтаксис FTS5 (OR, NEAR,
+    двоеточия) не срабатывал, и ищется по префиксу.
+    """
+    return ' '.join(f'"{word}"*' for word in WORD_RE.findall(query))
+
+
+def highlight(value):
+    escaped = escape(value)
+    return mark_safe(
+        escaped.replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+    )
+
+
+def search_news(query, limit):
+    """
+    Новости по запросу, лучшие совпадения первыми.
+
+    У найденных новостей есть title_html и snippet_html
+    с подсвеченными совпадениями.
+    """
+    match = build_match(query)
+    if not match:
+        return []
+    results = list(News.objects.raw(
+        SEARCH_SQL,
+        [MARK_START, MARK_END, MARK_START, MARK_END, match, limit],
+    ))
+    for news in results:
+        news.title_html = highlight(news.title_html)
+        news.snippet_html = highlight(news.snippet_html)
+    return results
@@ -0,0 +1,115 @@
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .auth import invalidate_user
+from .models import Comment, News, news_deleting
+
+APPROVED = Comment.Status.APPROVED
+UNKNOWN = object()
+
+
+def touch_news(news_id, comment_delta=0):
+    """
+    Атомарно увеличивает версию новости.
+
+    Заодно меняет счётчик комментариев на comment_delta. Счётчик не
+    уходит ниже нуля, даже если комментарий в нём не учитывался,
+    например загружен через loaddata.
+    """
+    changes = {'version': F('version') + 1}
+    if comment_delta:
+        changes['comment_count'] = Greatest(
+            F('comment_count') + comment_delta, 0
+        )
+    News.objects.filter(pk=news_id).update(**changes)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw, **kwargs):
+    # При loaddata (raw) счётчики восстанавливает recount_comments.
+    if raw:
+        return
+    previous = (
+        None if created else getattr(instance, '_saved_status', UNKNOWN)
+    )
+    previous_news_id = getattr(
+        instance, '_saved_news_id', instance.news_id
+    )
+    instance._saved_status = instance.status
+    instance._saved_news_id = instance.news_id
+    if previous is UNKNOWN:
+        # Прежний статус неизвестен: считаем заново.
+        News.objects.filter(
+            pk__in={previous_news_id, instance.news_id}
+        ).recount_comments()
+        return
+    was_visible = previous == APPROVED
+    if previous_news_id != instance.news_id:
+        # Комментарий перенесли в другую новость.
+        if was_visible:
+            touch_news(previous_news_id, -1)
+        if instance.is_approved:
+            touch_news(instance.news_id, 1)
+    elif instance.is_approved or was_visible:
+        touch_news(instance.news_id, instance.is_approved - was_visible)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    # Срабатывает и при каскадном удалении, и при QuerySet.delete().
+    # Новость, которая удаляется вместе с комментариями, не трогаем.
+    if instance.is_approved and not news_deleting.get():
+        touch_news(instance.news_id, -1)
+
+
+@receiver(post_save, sender=News)
+def news_saved(sender, instance, created, raw, **kwargs):
+    if not created and not raw:
+        touch_news(instance.pk)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, **kwargs):
+    # Смена пароля, блокировка, вход (last_login) — всё через save().
+    invalidate_user(instance.pk)
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def user_saving(sender, instance, raw, using, update_fields, **kwargs):
+    """
+    Запоминает, сменилось ли имя пользователя.
+
+    Имя авторов есть во фрагментах и ETag страниц новостей, а они
+    зависят только от версии. Вход сохраняет лишь last_login, поэтому
+    лишнего запроса при нём нет.
+    """
+    field = sender.USERNAME_FIELD
+    instance._username_changed = False
+    if raw or instance._state.adding or (
+        update_fields is not None and field not in update_fields
+    ):
+        return
+    instance._username_changed = sender._default_manager.using(
+        using
+    ).filter(pk=instance.pk).exclude(
+        **{field: instance.get_username()}
+    ).exists()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def username_changed(sender, instance, **kwargs):
+    if getattr(instance, '_username_changed', False):
+        News.objects.filter(comment__author=instance).update(
+            version=F('version') + 1
+        )
+
+
+@receiver(user_logged_out)
+def logged_out(sender, request, user, **kwargs):
+    if user is not None:
+        invalidate_user(user.pk)
@@ -0,0 +1,41 @@
+from django import template
+
+from news.cache import get_or_render
+
+register = template.Library()
+
+
+class FragmentCacheNode(template.Node):
+
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        return get_or_render(
+            self.name.resolve(context),
+            [var.resolve(context) for var in self.vary_on],
+            lambda: self.nodelist.render(context),
+        )
+
+
+@register.tag
+def cachefragment(parser, token):
+    """
+    Кеширует фрагмент шаблона с учётом статистики попаданий.
+
+    {% cachefragment "имя" news.pk news.version %}...{% endcachefragment %}
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(
+            f'Тегу {bits[0]} нужно имя фрагмента.'
+        )
+    nodelist = parser.parse(('endcachefragment',))
+    parser.delete_first_token()
+    return FragmentCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]],
+    )
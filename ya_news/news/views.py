@@ -1,13 +1,43 @@
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import get_object_or_404
+from django.db import router
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.urls import reverse
+from django.utils.decorators import method_decorator
+from django.utils.functional import SimpleLazyObject
 from django.views import generic
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import condition
 
+from yanews.middleware import LOCAL_ADDRESSES
+
+from . import cache, conditional, moderation
+from .feeds import stream_comments
 from .forms import CommentForm
 from .models import Comment, News
+from .pagination import after_cursor, keyset_paginate
+from .search import search_news
+
+
+class CachedObjectMixin:
+    """
+    Запоминает объект на время запроса.
+
+    Экземпляр представления живёт ровно один запрос, поэтому повторные
+    вызовы get_object() не должны снова обращаться к базе.
+    """
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        if not hasattr(self, '_object_cache'):
+            self._object_cache = super().get_object()
+        return self._object_cache
 
 
+@method_decorator(
+    condition(etag_func=conditional.news_list_etag), name='dispatch'
+)
 class NewsList(generic.ListView):
     """Список новостей."""
     model = News
@@ -19,20 +49,95 @@ class NewsList(generic.ListView):
 
         Их количество определяется в настройках проекта.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        return self.model.objects.all()[:settings.NEWS_COUNT_ON_HOME_PAGE]
+
+    def get_context_data(self, **kwargs):
+        """
+        Версии новостей страницы для ключа кеша.
+
+        Сам список остаётся ленивым и читается только при промахе кеша.
+        """
+        context = super().get_context_data(**kwargs)
+        context['news_versions'] = conditional.news_versions(self.request)
+        return context
 
 
-class NewsDetail(generic.DetailView):
+class NewsArchive(generic.ListView):
+    """Архив новостей с постраничным переходом по курсору."""
+    model = News
+    template_name = 'news/archive.html'
+
+    def get_queryset(self):
+        """
+        Страница архива после курсора из GET-параметра cursor.
+
+        Сортировка та же, что на главной, с уточнением по id.
+        """
+        self.page = keyset_paginate(
+            self.model.objects.all(),
+            'date',
+            cursor=self.request.GET.get('cursor'),
+            per_page=settings.NEWS_COUNT_ON_HOME_PAGE,
+            descending=True,
+        )
+        return self.page.object_list
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['next_cursor'] = self.page.next_cursor
+        return context
+
+
+class NewsSearch(generic.ListView):
+    """Полнотекстовый поиск по новостям."""
+    template_name = 'news/search.html'
+
+    def get_queryset(self):
+        """Лучшие совпадения с запросом из GET-параметра q."""
+        return search_news(
+            self.request.GET.get('q', ''), settings.NEWS_SEARCH_LIMIT
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
+
+class NewsCommentsMixin:
+    """Порция комментариев новости после курсора из GET-параметра."""
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        cursor = self.request.GET.get('cursor')
+        comments = self.object.comment_set.approved().select_related(
+            'author'
+        )
+        context['cursor'] = cursor
+        # Ленивая страница: при попадании в кеш фрагмента не читается.
+        context['comment_page'] = SimpleLazyObject(
+            lambda: keyset_paginate(
+                comments,
+                'created',
+                cursor=cursor,
+                per_page=settings.COMMENTS_PER_PAGE,
+            )
+        )
+        return context
+
+
+@method_decorator(
+    condition(etag_func=conditional.news_detail_etag), name='dispatch'
+)
+class NewsDetail(NewsCommentsMixin, generic.DetailView):
     model = News
     template_name = 'news/detail.html'
 
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
+        """Новость уже прочитана при расчёте ETag."""
+        obj = conditional.news_object(self.request, self.kwargs['pk'])
+        if obj is None:
+            raise Http404
         return obj
 
     def get_context_data(self, **kwargs):
@@ -42,8 +147,60 @@ class NewsDetail(generic.DetailView):
         return context
 
 
+class CommentList(NewsCommentsMixin, generic.DetailView):
+    """Следующая порция комментариев в виде HTML-фрагмента."""
+    model = News
+    template_name = 'news/comments.html'
+
+    def get_queryset(self):
+        """Для фрагмента от новости нужны только ключ и версия."""
+        return self.model.objects.only('id', 'version')
+
+
+class CommentFeed(generic.View):
+    """
+    Опубликованные комментарии новости в JSON для мобильного клиента.
+
+    Не больше limit комментариев после курсора из GET-параметра cursor
+    в порядке Comment.Meta.ordering. Базу для чтения роутер выбирает
+    здесь, пока действует закрепление за основной после записи; сами
+    строки читаются порциями по мере отдачи ответа и в памяти целиком
+    не собираются.
+    """
+
+    def get(self, request, pk):
+        if not News.objects.filter(pk=pk).exists():
+            raise Http404
+        try:
+            limit = int(request.GET.get('limit', settings.COMMENTS_PER_PAGE))
+        except ValueError:
+            return JsonResponse(
+                {'error': 'limit должен быть числом.'}, status=400
+            )
+        limit = min(max(limit, 1), settings.COMMENT_FEED_MAX_LIMIT)
+        field_name = Comment._meta.ordering[0]
+        rows = after_cursor(
+            Comment.objects.approved().filter(news_id=pk),
+            field_name,
+            cursor=request.GET.get('cursor'),
+        ).values_list(
+            'pk', field_name, 'text', 'author__username'
+        ).using(router.db_for_read(Comment))
+        return StreamingHttpResponse(
+            stream_comments(
+                rows[:limit + 1].iterator(
+                    chunk_size=settings.COMMENT_FEED_CHUNK_SIZE
+                ),
+                limit,
+            ),
+            content_type='application/json',
+        )
+
+
 class NewsComment(
         LoginRequiredMixin,
+        NewsCommentsMixin,
+        CachedObjectMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -59,12 +216,15 @@ class NewsComment(
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
+        comment.status = Comment.Status.PENDING
         comment.save()
+        moderation.schedule(comment)
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
@@ -78,19 +238,20 @@ class NewsDetailView(generic.View):
         return view(request, *args, **kwargs)
 
 
-class CommentBase(LoginRequiredMixin):
+class CommentBase(LoginRequiredMixin, CachedObjectMixin):
     """Базовый класс для работы с комментариями."""
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
         """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        return self.model.objects.filter(
+            author=self.request.user
+        ).select_related('news')
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
@@ -98,7 +259,32 @@ class CommentUpdate(CommentBase, generic.UpdateView):
     template_name = 'news/edit.html'
     form_class = CommentForm
 
+    def form_valid(self, form):
+        """Изменённый текст снова уходит на модерацию, как новый."""
+        if 'text' not in form.changed_data:
+            return super().form_valid(form)
+        form.instance.status = Comment.Status.PENDING
+        response = super().form_valid(form)
+        moderation.schedule(self.object)
+        return response
+
 
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+
+@never_cache
+def fragment_cache_metrics(request):
+    """
+    Счётчики кеша фрагментов этого процесса, только с локальных адресов.
+
+    С locmem счётчики есть только у процесса сервера, поэтому
+    fragment_cache_stats читает их отсюда. ?reset обнуляет счётчики.
+    """
+    if request.META.get('REMOTE_ADDR') not in LOCAL_ADDRESSES:
+        raise Http404
+    snapshot = cache.stats()
+    if 'reset' in request.GET:
+        cache.reset_stats()
+    return JsonResponse(snapshot)
@@ -0,0 +1,149 @@
+import threading
+from collections import Counter, OrderedDict
+from time import monotonic
+
+from django.http import HttpResponse
+
+COUNTERS = ('hits', 'stale', 'misses', 'waits', 'evictions')
+
+
+def is_cacheable(response):
+    """Готовый ответ 200 без cookie и без запрета кеширования."""
+    cache_control = response.get('Cache-Control', '')
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and 'private' not in cache_control
+        and 'no-store' not in cache_control
+    )
+
+
+class Entry:
+    __slots__ = ('status', 'headers', 'content', 'expires', 'stale_until')
+
+    def __init__(self, response, ttl, stale_ttl):
+        now = monotonic()
+        self.status = response.status_code
+        self.headers = list(response.items())
+        self.content = response.content
+        self.expires = now + ttl
+        self.stale_until = self.expires + stale_ttl
+
+    @property
+    def size(self):
+        return len(self.content) + sum(
+            len(name) + len(value) for name, value in self.headers
+        )
+
+    def response(self):
+        """Новый объект ответа: middleware выше могут менять заголовки."""
+        response = HttpResponse(self.content, status=self.status)
+        for name, value in self.headers:
+            response[name] = value
+        return response
+
+
+class MicroCache:
+    """
+    Ответы по ключу: LRU с лимитом в байтах и коротким TTL.
+
+    Промах по ключу рендерит только один поток. Остальные получают
+    устаревший ответ, если он ещё хранится (stale_ttl после истечения
+    TTL), или ждут первый поток не дольше wait_timeout секунд.
+    """
+
+    def __init__(self, max_bytes, ttl, stale_ttl, wait_timeout):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._size = 0
+        self._counters = Counter()
+
+    def fetch(self, key, render):
+        """
+        Ответ из кеша или от render() и состояние: HIT, STALE или MISS.
+
+        render() вызывается без блокировки; подходящий ответ
+        сохраняется для следующих запросов.
+        """
+        with self._lock:
+            entry = self._entry(key)
+            if entry is not None and monotonic() < entry.expires:
+                self._counters['hits'] += 1
+                return entry.response(), 'HIT'
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = threading.Event()
+                leader = True
+            elif entry is not None:
+                self._counters['stale'] += 1
+                return entry.response(), 'STALE'
+            else:
+                leader = False
+                self._counters['waits'] += 1
+        if not leader:
+            flight.wait(self.wait_timeout)
+            with self._lock:
+                entry = self._entry(key)
+                if entry is not None and monotonic() < entry.expires:
+                    self._counters['hits'] += 1
+                    return entry.response(), 'HIT'
+            # Ответ первого потока не сохранился: рендерим сами, но
+            # без очереди, чтобы некешируемые страницы не ждали друг друга.
+        try:
+            with self._lock:
+                self._counters['misses'] += 1
+            response = render()
+            self._store(key, response)
+        finally:
+            if leader:
+                with self._lock:
+                    del self._flights[key]
+                flight.set()
+        return response, 'MISS'
+
+    def _entry(self, key):
+        """Запись по ключу, если её ещё можно отдать хотя бы устаревшей."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if monotonic() >= entry.stale_until:
+            del self._entries[key]
+            self._size -= entry.size
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key, response):
+        if not is_cacheable(response):
+            return
+        entry = Entry(response, self.ttl, self.stale_ttl)
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous.size
+            self._entries[key] = entry
+            self._size += entry.size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size
+                self._counters['evictions'] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                **{name: self._counters[name] for name in COUNTERS},
+                'entries': len(self._entries),
+                'bytes': self._size,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self._counters.clear()
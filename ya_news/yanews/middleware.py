@@ -0,0 +1,394 @@
+import logging
+import random
+import re
+import threading
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import Http404, JsonResponse
+from django.template.base import Template
+from django.utils.cache import get_conditional_response
+
+from . import routers
+from .microcache import MicroCache
+
+logger = logging.getLogger(__name__)
+
+# Списки IN (%s, %s, …) разной длины считаются одним запросом.
+PLACEHOLDERS_RE = re.compile(r'%s(?:, %s)+')
+
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+
+
+def query_shape(sql):
+    """Текст запроса без разницы в числе параметров."""
+    return PLACEHOLDERS_RE.sub('%s, …', sql)
+
+
+class RequestQueries:
+    """Обёртка для execute_wrapper: запросы к базе одного ответа."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += perf_counter() - start
+            self.count += 1
+            self.shapes[query_shape(sql)] += 1
+
+    def repeated(self, threshold):
+        """Запросы, выполненные не меньше threshold раз: признак N+1."""
+        return {
+            shape: count
+            for shape, count in self.shapes.items()
+            if count >= threshold
+        }
+
+
+class QueryStats:
+    """Сводка по именам представлений, общая для потоков процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def add(self, view_name, queries, repeated, over_budget):
+        with self._lock:
+            view = self._views.setdefault(view_name, {
+                'requests': 0,
+                'queries': 0,
+                'max_queries': 0,
+                'db_ms': 0.0,
+                'over_budget': 0,
+                'n_plus_one': Counter(),
+            })
+            view['requests'] += 1
+            view['queries'] += queries.count
+            view['max_queries'] = max(view['max_queries'], queries.count)
+            view['db_ms'] += queries.duration * 1000
+            view['over_budget'] += over_budget
+            view['n_plus_one'].update(repeated.keys())
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: {
+                    'requests': view['requests'],
+                    'avg_queries': round(
+                        view['queries'] / view['requests'], 2
+                    ),
+                    'max_queries': view['max_queries'],
+                    'avg_db_ms': round(view['db_ms'] / view['requests'], 3),
+                    'budget': settings.QUERY_BUDGETS.get(name),
+                    'over_budget': view['over_budget'],
+                    # Запрос → в скольких ответах он повторялся.
+                    'n_plus_one': dict(view['n_plus_one'].most_common(10)),
+                }
+                for name, view in sorted(self._views.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+stats = QueryStats()
+
+
+class QueryBudgetMiddleware:
+    """
+    Считает запросы к базе и их время по имени представления.
+
+    Повторы одного запроса и превышение QUERY_BUDGETS (по имени
+    представления и методу) пишутся в лог.
+    Сводка отдаётся по QUERY_METRICS_URL только с локальных адресов.
+    Если QUERY_METRICS_ENABLED ложно, Django исключает middleware
+    из цепочки, и накладных расходов нет.
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path == settings.QUERY_METRICS_URL:
+            return self.metrics(request)
+        queries = RequestQueries()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+        if request.resolver_match is not None:
+            self.record(
+                request.resolver_match.view_name, request.method, queries
+            )
+        return response
+
+    @staticmethod
+    def record(view_name, method, queries):
+        repeated = queries.repeated(settings.QUERY_REPEAT_THRESHOLD)
+        budget = settings.QUERY_BUDGETS.get(view_name, {}).get(method)
+        over_budget = budget is not None and queries.count > budget
+        for shape, count in repeated.items():
+            logger.warning(
+                'Возможно N+1 в %s: запрос выполнен %d раз: %s',
+                view_name, count, shape,
+            )
+        if over_budget:
+            logger.warning(
+                '%s %s: %d запросов к базе при бюджете %d',
+                view_name, method, queries.count, budget,
+            )
+        stats.add(view_name, queries, repeated, over_budget)
+
+    @staticmethod
+    def metrics(request):
+        if request.META.get('REMOTE_ADDR') not in LOCAL_ADDRESSES:
+            raise Http404
+        snapshot = stats.snapshot()
+        if 'reset' in request.GET:
+            stats.reset()
+        return JsonResponse(
+            snapshot, json_dumps_params={'ensure_ascii': False}
+        )
+
+
+class RequestTiming:
+    """
+    Фазы одного запроса для заголовка Server-Timing.
+
+    db — время запросов к базе, view — от вызова представления до
+    отрисовки шаблона, template — отрисовка TemplateResponse,
+    middleware — остальное. db пересекается с view и template:
+    ленивые QuerySet выполняются при отрисовке.
+    """
+
+    def __init__(self, templates=False):
+        self.started = perf_counter()
+        self.db = 0.0
+        self.view_started = None
+        self.render_started = None
+        self.template = 0.0
+        self.templates = defaultdict(float) if templates else None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += perf_counter() - start
+
+    def header(self):
+        total = perf_counter() - self.started
+        view = 0.0
+        if self.view_started is not None:
+            view = (self.render_started or self.started + total) - (
+                self.view_started
+            )
+        phases = [
+            ('total', total),
+            ('db', self.db),
+            ('view', view),
+            ('template', self.template),
+            ('middleware', max(total - view - self.template, 0.0)),
+        ]
+        metrics = [f'{name};dur={value * 1000:.2f}' for name, value in phases]
+        for index, (name, value) in enumerate(sorted(
+            (self.templates or {}).items(), key=lambda item: -item[1]
+        )):
+            metrics.append(
+                f'tpl{index};desc="{name}";dur={value * 1000:.2f}'
+            )
+        return ', '.join(metrics)
+
+
+current_timing = ContextVar('current_timing', default=None)
+
+
+def timed_template_render(render):
+    """Обёртка Template._render: время каждого шаблона и include."""
+
+    @wraps(render)
+    def _render(template, context):
+        timing = current_timing.get()
+        if timing is None or timing.templates is None:
+            return render(template, context)
+        start = perf_counter()
+        try:
+            return render(template, context)
+        finally:
+            # Время включает вложенные шаблоны и родителя по extends.
+            timing.templates[template.name or '<string>'] += (
+                perf_counter() - start
+            )
+
+    _render.server_timing = True
+    return _render
+
+
+def install_template_timing():
+    """Оборачивает Template._render один раз на процесс."""
+    if not getattr(Template._render, 'server_timing', False):
+        Template._render = timed_template_render(Template._render)
+
+
+class ServerTimingMiddleware:
+    """
+    Заголовок Server-Timing с фазами db, view, template и middleware.
+
+    Замеряется доля SERVER_TIMING_SAMPLE_RATE запросов, остальные
+    проходят без накладных расходов; при нулевой доле Django
+    исключает middleware из цепочки. SERVER_TIMING_TEMPLATES добавляет
+    время каждого шаблона, включая {% include %}. Должен стоять первым
+    в MIDDLEWARE, чтобы учитывать остальные middleware.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING_SAMPLE_RATE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        # Без SERVER_TIMING_TEMPLATES шаблоны Django не трогаем.
+        self.templates = settings.SERVER_TIMING_TEMPLATES
+        if self.templates:
+            install_template_timing()
+
+    def __call__(self, request):
+        if random.random() >= settings.SERVER_TIMING_SAMPLE_RATE:
+            return self.get_response(request)
+        timing = RequestTiming(self.templates)
+        request.server_timing = timing
+        token = current_timing.set(timing)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timing))
+                response = self.get_response(request)
+        finally:
+            current_timing.reset(token)
+        response['Server-Timing'] = timing.header()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timing = getattr(request, 'server_timing', None)
+        if timing is not None:
+            timing.view_started = perf_counter()
+
+    def process_template_response(self, request, response):
+        timing = getattr(request, 'server_timing', None)
+        if timing is None:
+            return response
+        render = response.render
+
+        def timed_render():
+            timing.render_started = perf_counter()
+            try:
+                return render()
+            finally:
+                timing.template += perf_counter() - timing.render_started
+
+        response.render = timed_render
+        return response
+
+
+class PrimaryStickinessMiddleware:
+    """
+    Читать свои записи: после записи пользователь читает с основной базы.
+
+    Запрос, который писал в базу, ставит подписанную cookie; пока ей
+    меньше REPLICA_STICKY_SECONDS, запросы этого пользователя не идут
+    в реплики. Без DATABASE_REPLICAS middleware не используется.
+    """
+
+    cookie_name = 'primary_db'
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sticky = request.get_signed_cookie(
+            self.cookie_name,
+            default=None,
+            salt=self.cookie_name,
+            max_age=settings.REPLICA_STICKY_SECONDS,
+        )
+        token = routers.start_request(pinned=sticky is not None)
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = routers.finish_request(token)
+        if wrote:
+            response.set_signed_cookie(
+                self.cookie_name,
+                '1',
+                salt=self.cookie_name,
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+
+class MicroCacheMiddleware:
+    """
+    Кеш готовых ответов на анонимные GET-запросы на MICROCACHE_TTL секунд.
+
+    Анонимный — запрос без cookie сессии и без привязки к основной
+    базе. Холодную страницу рендерит один поток, остальные ждут его или
+    получают устаревший ответ, см. yanews.microcache. Попадания, промахи
+    и вытеснения отдаются по MICROCACHE_METRICS_URL только с локальных
+    адресов. При нулевом MICROCACHE_TTL middleware не используется.
+    """
+
+    def __init__(self, get_response):
+        if not settings.MICROCACHE_TTL:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.cache = MicroCache(
+            max_bytes=settings.MICROCACHE_MAX_BYTES,
+            ttl=settings.MICROCACHE_TTL,
+            stale_ttl=settings.MICROCACHE_STALE_TTL,
+            wait_timeout=settings.MICROCACHE_WAIT_TIMEOUT,
+        )
+
+    def __call__(self, request):
+        if request.path == settings.MICROCACHE_METRICS_URL:
+            return self.metrics(request)
+        if request.method not in ('GET', 'HEAD') or (
+            settings.SESSION_COOKIE_NAME in request.COOKIES
+            or PrimaryStickinessMiddleware.cookie_name in request.COOKIES
+        ):
+            return self.get_response(request)
+        # Ответ на HEAD тот же, что на GET, без тела: его отрежет сервер.
+        key = f'{request.get_host()}{request.get_full_path()}'
+        response, state = self.cache.fetch(
+            key, lambda: self.get_response(request)
+        )
+        if state != 'MISS':
+            response = get_conditional_response(
+                request, etag=response.get('ETag'), response=response
+            )
+        response['X-Microcache'] = state
+        return response
+
+    def metrics(self, request):
+        if request.META.get('REMOTE_ADDR') not in LOCAL_ADDRESSES:
+            raise Http404
+        snapshot = self.cache.stats()
+        if 'reset' in request.GET:
+            self.cache.reset_stats()
+        return JsonResponse(snapshot)
@@ -0,0 +1,70 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Сессии и пользователи всегда читаются с основной базы: иначе сразу
+# после входа реплика, которая ещё не догнала основную, разлогинит.
+PRIMARY_APPS = {'auth', 'sessions'}
+
+
+class RequestState:
+    __slots__ = ('pinned', 'wrote')
+
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_state = ContextVar('replica_state', default=None)
+
+
+def start_request(pinned=False):
+    """
+    Начинает учёт записи для текущего запроса.
+
+    pinned — читать всё с основной базы с самого начала.
+    """
+    return _state.set(RequestState(pinned))
+
+
+def finish_request(token):
+    """Завершает учёт и сообщает, писал ли запрос в базу."""
+    state = _state.get()
+    _state.reset(token)
+    return state.wrote
+
+
+class PrimaryReplicaRouter:
+    """
+    Запись — в основную базу, чтение — в реплики DATABASE_REPLICAS.
+
+    После первой записи запрос до конца читает с основной базы; то же
+    внутри открытой транзакции. Между запросами пользователя к
+    основной базе привязывает PrimaryStickinessMiddleware.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or model._meta.app_label in PRIMARY_APPS:
+            return DEFAULT_DB_ALIAS
+        state = _state.get()
+        if state is not None and state.pinned:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии основной базы, связи между ними допустимы.
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
@@ -1,3 +1,5 @@
+import json
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -21,6 +23,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yanews.middleware.ServerTimingMiddleware',
+    'yanews.middleware.QueryBudgetMiddleware',
+    'yanews.middleware.MicroCacheMiddleware',
+    'yanews.middleware.PrimaryStickinessMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -55,9 +61,50 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Файл тестовой базы для parallel_tests.py, иначе база в памяти.
+        'TEST': {'NAME': os.environ.get('YANEWS_TEST_DB')},
     }
 }
 
+# Реплики только для чтения, см. yanews.routers. Для проверки на
+# одной машине YANEWS_REPLICA_DB указывает на копию db.sqlite3.
+DATABASE_REPLICAS = []
+if os.environ.get('YANEWS_REPLICA_DB'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['YANEWS_REPLICA_DB'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS = ['replica']
+
+DATABASE_ROUTERS = ['yanews.routers.PrimaryReplicaRouter']
+
+# Сколько секунд после записи пользователь читает с основной базы.
+REPLICA_STICKY_SECONDS = 10
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
+# Сессии читаются из кеша, база — запасное хранилище. С
+# YANEWS_SIGNED_COOKIE_SESSIONS=1 сессия целиком хранится в подписанной
+# cookie: без обращений к базе, но выход не отзывает её копии.
+SESSION_ENGINE = (
+    'django.contrib.sessions.backends.signed_cookies'
+    if os.environ.get('YANEWS_SIGNED_COOKIE_SESSIONS')
+    else 'django.contrib.sessions.backends.cached_db'
+)
+
+# Пользователь сессии тоже берётся из кеша, см. news.auth. При
+# нескольких процессах кеш должен быть общим, иначе выход и смена
+# пароля видны только в одном из них.
+AUTHENTICATION_BACKENDS = ['news.auth.CachedModelBackend']
+AUTH_USER_CACHE_TIMEOUT = 60 * 5
+
 
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -80,3 +127,51 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+COMMENTS_PER_PAGE = 50
+# Наибольший limit ленты комментариев news:comment_feed.
+COMMENT_FEED_MAX_LIMIT = 10_000
+# Строк ленты в одной порции чтения из базы.
+COMMENT_FEED_CHUNK_SIZE = 500
+
+NEWS_SEARCH_LIMIT = 20
+
+# Файл со списком запрещённых слов, по одному в строке. Перечитывается
+# при изменении; если не задан, используется news.forms.BAD_WORDS.
+BAD_WORDS_FILE = None
+
+# Потоков модерации комментариев; 0 — модерировать прямо в запросе.
+COMMENT_MODERATION_WORKERS = 2
+COMMENT_MAX_LINKS = 2
+
+NEWS_FRAGMENT_CACHE_TIMEOUT = 60 * 15
+# Счётчики кеша фрагментов процесса сервера, см. fragment_cache_stats.
+FRAGMENT_CACHE_METRICS_URL = '/__fragments__/'
+
+# Сводка запросов к базе по представлениям, см. yanews.middleware.
+QUERY_METRICS_ENABLED = DEBUG
+QUERY_METRICS_URL = '/__queries__/'
+# Столько одинаковых запросов за ответ считаются признаком N+1.
+QUERY_REPEAT_THRESHOLD = 5
+# Предельное число запросов к базе по имени представления и методу.
+# Тот же файл проверяют тесты news/pytest_tests/test_query_budgets.py.
+QUERY_BUDGETS = json.loads(
+    (BASE_DIR / 'yanews' / 'query_budgets.json').read_text(encoding='utf-8')
+)
+
+# Доля запросов с заголовком Server-Timing, от 0 до 1; 0 — выключено.
+SERVER_TIMING_SAMPLE_RATE = 1.0 if DEBUG else 0.0
+# Добавлять в Server-Timing время каждого шаблона и include.
+SERVER_TIMING_TEMPLATES = False
+
+# Кеш ответов анонимным пользователям в памяти процесса, см.
+# yanews.microcache; 0 — выключен. При DEBUG выключен, чтобы правки
+# шаблонов и данных сразу были видны (Server-Timing, наоборот, при
+# DEBUG включён). Устаревший ответ отдаётся ещё MICROCACHE_STALE_TTL
+# секунд, пока новый рендерит другой поток.
+MICROCACHE_TTL = 0 if DEBUG else 2
+MICROCACHE_STALE_TTL = 10
+MICROCACHE_MAX_BYTES = 32 * 1024 * 1024
+# Сколько секунд запрос ждёт поток, который рендерит холодную страницу.
+MICROCACHE_WAIT_TIMEOUT = 5
+MICROCACHE_METRICS_URL = '/__microcache__/'
@@ -1,12 +1,19 @@
+from django.conf import settings
 from django.contrib import admin
 from django.contrib.auth import views as auth_views
 from django.contrib.auth.forms import UserCreationForm
 from django.urls import include, path
 from django.views.generic import CreateView
 
+from news.views import fragment_cache_metrics
+
 urlpatterns = [
     path('', include('news.urls')),
     path('admin/', admin.site.urls),
+    path(
+        settings.FRAGMENT_CACHE_METRICS_URL.lstrip('/'),
+        fragment_cache_metrics,
+    ),
 ]
 
 auth_urls = ([
@@ -0,0 +1,67 @@
+from time import time_ns
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+KEY_PREFIX = 'notes:user'
+
+
+def user_key(user_id):
+    return f'{KEY_PREFIX}:{user_id}'
+
+
+def version_key(user_id):
+    return f'{KEY_PREFIX}:{user_id}:version'
+
+
+def user_version(user_id):
+    """
+    Текущая версия записи пользователя в кеше.
+
+    Если счётчик вытеснен, новая версия — время в наносекундах: она не
+    совпадает ни с одной из прежних.
+    """
+    version = cache.get(version_key(user_id))
+    if version is None:
+        version = time_ns()
+        if not cache.add(version_key(user_id), version, timeout=None):
+            version = cache.get(version_key(user_id), version)
+    return version
+
+
+def invalidate_user(user_id):
+    """
+    Сбрасывает пользователя в кеше.
+
+    Запись под старой версией больше не читается, даже если её успел
+    сохранить параллельный запрос, прочитавший пользователя до изменения.
+    """
+    try:
+        cache.incr(version_key(user_id))
+    except ValueError:
+        cache.set(version_key(user_id), time_ns(), timeout=None)
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend, который берёт пользователя сессии из кеша.
+
+    AuthenticationMiddleware вызывает get_user на каждый запрос
+    авторизованного пользователя; запись сбрасывается сигналами из
+    notes.signals при сохранении пользователя и при выходе.
+    """
+
+    def get_user(self, user_id):
+        version = user_version(user_id)
+        user = cache.get(user_key(user_id), version=version)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(
+                    user_key(user_id),
+                    user,
+                    settings.AUTH_USER_CACHE_TIMEOUT,
+                    version=version,
+                )
+        return user
@@ -0,0 +1,91 @@
+import csv
+import json
+import zipfile
+
+# Столько символов или байт копится перед отправкой части ответа.
+CHUNK_SIZE = 64 * 1024
+
+FIELDS = ('title', 'text', 'slug')
+
+
+def chunked(pieces, size=CHUNK_SIZE):
+    """Склеивает мелкие строки в части ответа не меньше size."""
+    buffer, length = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        length += len(piece)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_ndjson(rows):
+    """Заметка в строке: {"title": …, "text": …, "slug": …}."""
+    return chunked(
+        json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False) + '\n'
+        for row in rows
+    )
+
+
+class Echo:
+    """Файловый объект для csv.writer: запись возвращает строку."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.writer(Echo())
+    return chunked(
+        writer.writerow(row)
+        for row in _with_header(rows)
+    )
+
+
+def _with_header(rows):
+    yield FIELDS
+    yield from rows
+
+
+class StreamBuffer:
+    """
+    Поток без seek и tell, в который пишет zipfile.
+
+    zipfile на таком потоке пишет размеры после данных каждого файла,
+    поэтому архив можно отдавать по частям, не дописав до конца.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self.chunks)
+        self.chunks, self.size = [], 0
+        return data
+
+
+def stream_zip(rows, size=CHUNK_SIZE):
+    """
+    ZIP-архив с файлом slug.txt на каждую заметку: заголовок и текст.
+
+    В памяти остаются только текущая часть ответа и оглавление архива
+    — по записи на файл, без содержимого.
+    """
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for title, text, slug in rows:
+            archive.writestr(f'{slug}.txt', f'{title}\n\n{text}\n')
+            if buffer.size >= size:
+                yield buffer.pop()
+    yield buffer.pop()
@@ -0,0 +1,173 @@
+# Тот же модуль лежит в ya_news/news/loadtest.py: ya_news и ya_note —
+# отдельные проекты со своими manage.py и без общего пакета,
+# поэтому у каждого своя копия. Правьте обе.
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from io import BytesIO
+from statistics import mean, quantiles
+from time import perf_counter
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.db import connection
+
+METRICS = ('p50', 'p95', 'p99', 'rps', 'queries')
+
+
+class WSGIClient:
+    """
+    Вызывает WSGI-приложение как браузер: хранит cookie.
+
+    На запросы, меняющие данные, сам ставит заголовок X-CSRFToken.
+    """
+
+    def __init__(self, application, cookies=None):
+        self.application = application
+        self.cookies = dict(cookies or {})
+
+    def get(self, url):
+        return self.request('GET', url)
+
+    def post(self, url, data):
+        return self.request('POST', url, urlencode(data).encode())
+
+    def request(self, method, url, body=b''):
+        parts = urlsplit(url)
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': parts.path,
+            'QUERY_STRING': parts.query,
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+            'CONTENT_LENGTH': str(len(body)),
+            'HTTP_COOKIE': '; '.join(
+                f'{name}={value}' for name, value in self.cookies.items()
+            ),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        csrf_token = self.cookies.get(settings.CSRF_COOKIE_NAME)
+        if method != 'GET' and csrf_token:
+            environ['HTTP_X_CSRFTOKEN'] = csrf_token
+        statuses = []
+
+        def start_response(status, headers, exc_info=None):
+            statuses.append(int(status.split()[0]))
+            for name, value in headers:
+                if name.lower() == 'set-cookie':
+                    for morsel in SimpleCookie(value).values():
+                        self.cookies[morsel.key] = morsel.value
+
+        result = self.application(environ, start_response)
+        try:
+            for _ in result:
+                pass
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return statuses[0]
+
+
+class QueryCounter:
+    """Обёртка для connection.execute_wrapper, считает запросы к базе."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def run_scenario(scenario, clients, requests):
+    """
+    Прогоняет сценарий: каждый клиент в своём потоке.
+
+    scenario(client, number) выполняет один запрос и возвращает
+    код ответа. Ответы 4xx и 5xx считаются ошибками.
+    """
+    per_client = max(requests // len(clients), 1)
+
+    def work(client):
+        timings, queries, errors = [], [], 0
+        counter = QueryCounter()
+        try:
+            with connection.execute_wrapper(counter):
+                for number in range(per_client):
+                    counter.count = 0
+                    start = perf_counter()
+                    status = scenario(client, number)
+                    timings.append((perf_counter() - start) * 1000)
+                    queries.append(counter.count)
+                    errors += status >= 400
+        finally:
+            connection.close()
+        return timings, queries, errors
+
+    start = perf_counter()
+    with ThreadPoolExecutor(max_workers=len(clients)) as executor:
+        results = list(executor.map(work, clients))
+    elapsed = perf_counter() - start
+    timings = [timing for result in results for timing in result[0]]
+    queries = [count for result in results for count in result[1]]
+    return summarize(
+        timings, queries, sum(result[2] for result in results), elapsed
+    )
+
+
+def summarize(timings, queries, errors, elapsed):
+    """Перцентили задержки в мс, запросы в секунду и к базе на запрос."""
+    cuts = quantiles(timings, n=100) if len(timings) > 1 else timings * 99
+    return {
+        'requests': len(timings),
+        'errors': errors,
+        'rps': round(len(timings) / elapsed, 1),
+        'p50': round(cuts[49], 2),
+        'p95': round(cuts[94], 2),
+        'p99': round(cuts[98], 2),
+        'queries': round(mean(queries), 2),
+    }
+
+
+def save_baseline(path, results, **meta):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(
+            {'meta': meta, 'scenarios': results}, file,
+            ensure_ascii=False, indent=2,
+        )
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)['scenarios']
+
+
+def compare(baseline, results):
+    """
+    Изменения метрик сценариев относительно базового прогона.
+
+    Для задержек и числа запросов к базе рост в процентах — ухудшение,
+    для rps — улучшение.
+    """
+    changes = {}
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        changes[name] = {
+            metric: (
+                (current[metric] - previous[metric]) / previous[metric] * 100
+                if previous[metric] else 0.0
+            )
+            for metric in METRICS
+        }
+    return changes
@@ -0,0 +1,84 @@
+import tracemalloc
+from statistics import median
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from django.views import generic
+
+from notes.models import Note
+from notes.views import NoteBase, NotesList
+
+User = get_user_model()
+
+
+class FullNotesList(NoteBase, generic.ListView):
+    """Прежний вариант списка: все заметки со всеми полями."""
+    template_name = 'notes/list.html'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время и пик памяти списка заметок с постраничным '
+        'выводом и без него. Заметки создаются внутри транзакции, '
+        'которая в конце откатывается.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--notes', type=int, default=100_000)
+        parser.add_argument('--text-length', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = User.objects.create(username='bench_notes_list')
+            text = 'т' * options['text_length']
+            total = options['notes']
+            for start in range(0, total, options['batch_size']):
+                Note.objects.bulk_create(
+                    Note(
+                        title=f'Заметка {index}',
+                        text=text,
+                        slug=f'bench-{index}',
+                        author=user,
+                    )
+                    for index in range(
+                        start, min(start + options['batch_size'], total)
+                    )
+                )
+            request = RequestFactory().get('/notes/')
+            request.user = user
+            self.stdout.write(f'{"вид":>10} {"мс":>10} {"пик, МиБ":>10}')
+            for name, view in (
+                ('полный', FullNotesList.as_view()),
+                ('страница', NotesList.as_view()),
+            ):
+                timings, peak = self.measure(
+                    lambda: view(request).render(), options['repeat']
+                )
+                self.stdout.write(
+                    f'{name:>10} {timings:>10.1f} {peak / 2 ** 20:>10.1f}'
+                )
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def measure(func, repeat):
+        """
+        Медиана времени в миллисекундах и пик памяти в байтах.
+
+        Память меряется отдельным прогоном: tracemalloc
+        сильно замедляет код и исказил бы время.
+        """
+        timings = []
+        for _ in range(repeat):
+            start = perf_counter()
+            func()
+            timings.append((perf_counter() - start) * 1000)
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return median(timings), peak
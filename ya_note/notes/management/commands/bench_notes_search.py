@@ -0,0 +1,75 @@
+import random
+from statistics import median
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from notes.models import Note
+from notes.search import rebuild_index, search_note_ids
+
+User = get_user_model()
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщэюя'
+
+
+class Command(BaseCommand):
+    help = (
+        'Меряет время поиска по заметкам пользователя с большим числом '
+        'заметок среди заметок других авторов. Данные создаются внутри '
+        'транзакции, которая в конце откатывается.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--notes', type=int, default=100_000)
+        parser.add_argument('--other-notes', type=int, default=100_000)
+        parser.add_argument('--vocabulary', type=int, default=20_000)
+        parser.add_argument('--words-per-note', type=int, default=30)
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        vocabulary = [
+            ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(4, 10)))
+            for _ in range(options['vocabulary'])
+        ]
+        with transaction.atomic():
+            user = User.objects.create(username='bench_search')
+            other = User.objects.create(username='bench_search_other')
+            self.seed(rng, vocabulary, user, options['notes'], options)
+            self.seed(rng, vocabulary, other, options['other_notes'], options)
+            rebuild_index()
+            timings = []
+            for word in rng.sample(vocabulary, options['queries']):
+                start = perf_counter()
+                search_note_ids(user.pk, word, settings.NOTES_SEARCH_LIMIT)
+                timings.append((perf_counter() - start) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f'Заметок автора: {options["notes"]}, '
+                f'чужих: {options["other_notes"]}. '
+                f'Поиск: медиана {median(timings):.2f} мс, '
+                f'максимум {timings[-1]:.2f} мс'
+            )
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def seed(rng, vocabulary, author, total, options):
+        for start in range(0, total, options['batch_size']):
+            Note.objects.bulk_create(
+                Note(
+                    title=' '.join(rng.choices(vocabulary, k=3)),
+                    text=' '.join(
+                        rng.choices(vocabulary, k=options['words_per_note'])
+                    ),
+                    slug=f'bench-{author.pk}-{index}',
+                    author=author,
+                )
+                for index in range(
+                    start, min(start + options['batch_size'], total)
+                )
+            )
@@ -0,0 +1,80 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from notes.models import Note
+from notes.search import rebuild_index
+
+User = get_user_model()
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщэюя'
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет базу синтетическими пользователями и заметками для '
+        'нагрузочных прогонов (см. bench_http). Пользователи user0, '
+        'user1, … создаются без пароля; уже существующие '
+        'переиспользуются. Поисковый индекс перестраивается.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--notes-per-user', type=int, default=100)
+        parser.add_argument('--vocabulary', type=int, default=2000)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        vocabulary = [
+            ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(3, 10)))
+            for _ in range(options['vocabulary'])
+        ]
+        user_ids = self.create_users(options['users'], options['batch_size'])
+        notes = []
+        for user_id in user_ids:
+            start = Note.objects.filter(author_id=user_id).count()
+            for index in range(start, start + options['notes_per_user']):
+                notes.append(Note(
+                    title=' '.join(rng.choices(vocabulary, k=4)).title(),
+                    text=' '.join(rng.choices(vocabulary, k=40)),
+                    # Так slug не пересекается с подобранными Note.save().
+                    slug=f'generated-{user_id}-{index}',
+                    author_id=user_id,
+                ))
+            if len(notes) >= options['batch_size']:
+                Note.objects.bulk_create(notes)
+                notes = []
+        Note.objects.bulk_create(notes)
+        # bulk_create не вызывает сигналы, индекс строится заново.
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пользователей: {len(user_ids)}, заметок: '
+            f'{len(user_ids) * options["notes_per_user"]}'
+        ))
+
+    @staticmethod
+    def create_users(total, batch_size):
+        password = make_password(None)
+        user_ids = []
+        for start in range(0, total, batch_size):
+            usernames = [
+                f'user{index}'
+                for index in range(start, min(start + batch_size, total))
+            ]
+            User.objects.bulk_create(
+                (
+                    User(username=username, password=password)
+                    for username in usernames
+                ),
+                ignore_conflicts=True,
+            )
+            user_ids.extend(User.objects.filter(
+                username__in=usernames
+            ).values_list('pk', flat=True))
+        return user_ids
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from notes.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Перестраивает поисковый индекс заметок. Нужен после loaddata '
+        'и bulk_create, которые не вызывают сигналы.'
+    )
+
+    def handle(self, *args, **options):
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS('Индекс заметок перестроен.'))
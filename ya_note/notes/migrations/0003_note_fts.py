@@ -0,0 +1,41 @@
+# Generated by Django 3.2.15 on 2026-10-18 19:50
+
+from django.db import migrations
+
+FORWARD_SQL = (
+    """
+    CREATE VIRTUAL TABLE notes_note_fts USING fts5(
+        owner, title, text,
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    INSERT INTO notes_note_fts(rowid, owner, title, text)
+    SELECT id, 'u' || author_id, title, text FROM notes_note
+    """,
+)
+
+BACKWARD_SQL = (
+    'DROP TABLE IF EXISTS notes_note_fts',
+)
+
+
+def run_sql(statements):
+    def run(apps, schema_editor):
+        # Полнотекстовый индекс есть только в SQLite.
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_note_author_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_sql(FORWARD_SQL), run_sql(BACKWARD_SQL)),
+    ]
@@ -1,7 +1,14 @@
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, router, transaction
 
-from pytils.translit import slugify
+from .slugs import allocate_slug, transliterate
+
+# Сколько раз подбирать slug заново, если его успел занять
+# параллельный запрос. С каждой попыткой разброс случайной добавки к
+# суффиксу растёт в SLUG_SPREAD раз, но не больше SLUG_MAX_SPREAD.
+SLUG_ATTEMPTS = 10
+SLUG_SPREAD = 8
+SLUG_MAX_SPREAD = 10 ** 5
 
 
 class Note(models.Model):
@@ -28,11 +35,35 @@ class Note(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        indexes = (
+            # Список заметок автора читается по индексу без сортировки.
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+        )
+
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        if self.slug:
+            return super().save(*args, **kwargs)
+        max_slug_length = self._meta.get_field('slug').max_length
+        base = transliterate(self.title)
+        using = kwargs.get('using') or router.db_for_write(
+            Note, instance=self
+        )
+        others = Note.objects.using(using)
+        if self.pk is not None:
+            others = others.exclude(pk=self.pk)
+        for attempt in range(SLUG_ATTEMPTS):
+            spread = min(SLUG_SPREAD ** attempt, SLUG_MAX_SPREAD)
+            self.slug = allocate_slug(
+                others, base, max_slug_length, spread
+            )
+            try:
+                with transaction.atomic(using=using):
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if attempt == SLUG_ATTEMPTS - 1:
+                    self.slug = ''
+                    raise
@@ -0,0 +1,74 @@
+import re
+
+from django.db import connection
+
+FTS_TABLE = 'notes_note_fts'
+WORD_RE = re.compile(r'\w+')
+
+# Владелец хранится отдельной индексируемой колонкой: FTS5 пересекает
+# его список документов со списками слов запроса и не перебирает
+# совпадения чужих заметок.
+SEARCH_SQL = f"""
+    SELECT rowid FROM {FTS_TABLE}
+    WHERE {FTS_TABLE} MATCH %s
+    ORDER BY bm25({FTS_TABLE}, 0.0, 10.0, 1.0)
+    LIMIT %s
+"""
+
+
+def owner_token(author_id):
+    return f'u{author_id}'
+
+
+def index_note(note):
+    """Заменяет запись заметки в поисковом индексе."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [note.pk]
+        )
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE}(rowid, owner, title, text) '
+            'VALUES (%s, %s, %s, %s)',
+            [note.pk, owner_token(note.author_id), note.title, note.text],
+        )
+
+
+def unindex_note(note_id):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [note_id]
+        )
+
+
+def rebuild_index():
+    """Строит индекс заново по всем заметкам, например после bulk_create."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE}(rowid, owner, title, text) '
+            "SELECT id, 'u' || author_id, title, text FROM notes_note"
+        )
+
+
+def build_match(author_id, query):
+    """
+    Запрос FTS5: слова пользователя по префиксу, только в его заметках.
+
+    Слова берутся в кавычки, чтобы синтаксис FTS5 в запросе
+    не срабатывал.
+    """
+    words = WORD_RE.findall(query)
+    if not words:
+        return ''
+    terms = ' '.join(f'"{word}"*' for word in words)
+    return f'owner : {owner_token(author_id)} AND {{title text}} : ({terms})'
+
+
+def search_note_ids(author_id, query, limit):
+    """Номера заметок автора по запросу, лучшие совпадения первыми."""
+    match = build_match(author_id, query)
+    if not match:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(SEARCH_SQL, [match, limit])
+        return [row[0] for row in cursor.fetchall()]
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .auth import invalidate_user
+from .models import Note
+from .search import index_note, unindex_note
+
+
+@receiver(post_save, sender=Note)
+def note_saved(sender, instance, raw, **kwargs):
+    # После loaddata индекс восстанавливает rebuild_notes_index.
+    if not raw:
+        index_note(instance)
+
+
+@receiver(post_delete, sender=Note)
+def note_deleted(sender, instance, **kwargs):
+    unindex_note(instance.pk)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, **kwargs):
+    # Смена пароля, блокировка, вход (last_login) — всё через save().
+    invalidate_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def logged_out(sender, request, user, **kwargs):
+    if user is not None:
+        invalidate_user(user.pk)
@@ -0,0 +1,49 @@
+import random
+import re
+from functools import lru_cache
+
+from django.db.models import Count, IntegerField, Max, Q
+from django.db.models.functions import Cast, Substr
+from pytils.translit import slugify
+
+# Место под суффикс «-N», если основа slug уже занята.
+SUFFIX_LENGTH = 8
+DEFAULT_SLUG = 'note'
+
+
+@lru_cache(maxsize=1024)
+def transliterate(title):
+    """Транслитерация заголовка: одинаковые заголовки считаются один раз."""
+    return slugify(title)
+
+
+def allocate_slug(queryset, base, max_length, spread=1):
+    """
+    Возвращает base, если он свободен, иначе base-N со следующим N.
+
+    Занятость основы и наибольший суффикс узнаются одним агрегирующим
+    запросом по диапазону уникального индекса на slug. При spread > 1
+    к N добавляется случайное число меньше spread: так параллельные
+    запросы, занявшие один и тот же N, расходятся при повторе.
+    """
+    base = base[:max_length] or DEFAULT_SLUG
+    prefix = base[:max_length - SUFFIX_LENGTH]
+    # Между «prefix-» и «prefix.» лежат ровно slug вида prefix-что-то;
+    # числом из них приводятся только суффиксы из цифр, которые
+    # помещаются в SUFFIX_LENGTH.
+    suffixed = Q(
+        slug__gt=f'{prefix}-',
+        slug__lt=f'{prefix}.',
+        slug__regex=rf'^{re.escape(prefix)}-[0-9]{{1,{SUFFIX_LENGTH - 1}}}$',
+    )
+    found = queryset.filter(Q(slug=base) | suffixed).aggregate(
+        taken=Count('pk', filter=Q(slug=base)),
+        last=Max(
+            Cast(Substr('slug', len(prefix) + 2), IntegerField()),
+            filter=suffixed,
+        ),
+    )
+    if not found['taken']:
+        return base
+    number = (found['last'] or 0) + 1 + random.randrange(spread)
+    return f'{prefix}-{number}'
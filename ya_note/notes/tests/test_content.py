@@ -1,9 +1,18 @@
+import csv
+import io
+import json
+import tracemalloc
+import zipfile
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.db.models import QuerySet
+from django.template.base import Template
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
 from notes.models import Note
 from notes.forms import NoteForm
+from yanote.middleware import ServerTimingMiddleware
 
 User = get_user_model()
 
@@ -53,3 +62,207 @@ class TestList(TestCase):
                 response = self.client.get(self.LIST_URL)
                 object_list = response.context['object_list']
                 args(self.note, object_list)
+
+    @override_settings(NOTES_PER_PAGE=2)
+    def test_notes_list_pages(self):
+        """
+        Тестирование постраничного вывода списка заметок
+        без повторов и пропусков.
+        """
+        Note.objects.bulk_create(
+            Note(
+                title=f'Заметка {index}',
+                text='Текст',
+                author=self.author,
+                slug=f'slug-{index}'
+            )
+            for index in range(4)
+        )
+        self.client.force_login(self.author)
+        seen = []
+        params = {}
+        while True:
+            response = self.client.get(self.LIST_URL, params)
+            object_list = response.context['object_list']
+            self.assertIsInstance(
+                response.context['view'].get_queryset(), QuerySet
+            )
+            self.assertLessEqual(len(object_list), 2)
+            seen.extend(object_list)
+            if response.context['next_after'] is None:
+                break
+            params = {'after': response.context['next_after']}
+        self.assertEqual(
+            seen, list(Note.objects.filter(author=self.author).order_by('id'))
+        )
+        self.assertNotIn('text', seen[0].__dict__)
+
+
+class TestSearch(TestCase):
+    SEARCH_URL = reverse('notes:search')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор Саша')
+        cls.author2 = User.objects.create(username='Автор Петя')
+        cls.note = Note.objects.create(
+            title='Список покупок',
+            text='Молоко и хлеб',
+            author=cls.author,
+            slug='shopping'
+        )
+        cls.other_note = Note.objects.create(
+            title='Чужие покупки',
+            text='Молоко',
+            author=cls.author2,
+            slug='other-shopping'
+        )
+
+    def search(self, query):
+        response = self.client.get(self.SEARCH_URL, {'q': query})
+        return response.context['object_list']
+
+    def test_search_finds_only_own_notes(self):
+        """Тестирование поиска только по заметкам автора."""
+        self.client.force_login(self.author)
+        self.assertEqual(self.search('молок'), [self.note])
+        self.assertEqual(self.search('чужие'), [])
+
+    def test_search_follows_edit_and_delete(self):
+        """Тестирование обновления индекса при правке и удалении."""
+        self.client.force_login(self.author)
+        self.client.post(
+            reverse('notes:edit', args=(self.note.slug,)),
+            {'title': 'Планы', 'text': 'Сходить в театр', 'slug': 'plans'}
+        )
+        self.assertEqual(self.search('молоко'), [])
+        self.assertEqual(self.search('театр'), [self.note])
+        self.client.post(reverse('notes:delete', args=('plans',)))
+        self.assertEqual(self.search('театр'), [])
+
+
+class TestExport(TestCase):
+    EXPORT_URL = reverse('notes:export')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор Саша')
+        cls.author2 = User.objects.create(username='Автор Петя')
+        Note.objects.bulk_create(
+            Note(
+                title=f'Заметка {index}',
+                text=f'Текст, "в кавычках"\nи на двух строках {index}',
+                author=cls.author,
+                slug=f'note-{index}'
+            )
+            for index in range(3)
+        )
+        Note.objects.create(
+            title='Чужая', text='Чужой текст', author=cls.author2,
+            slug='other'
+        )
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def export(self, export_format):
+        response = self.client.get(self.EXPORT_URL, {'format': export_format})
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment', response['Content-Disposition'])
+        return b''.join(response.streaming_content)
+
+    def test_formats_contain_only_own_notes(self):
+        """Тестирование выгрузки заметок автора во всех форматах."""
+        expected = [
+            (f'Заметка {index}',
+             f'Текст, "в кавычках"\nи на двух строках {index}',
+             f'note-{index}')
+            for index in range(3)
+        ]
+        lines = self.export('ndjson').decode().splitlines()
+        self.assertEqual(
+            [tuple(json.loads(line).values()) for line in lines], expected
+        )
+        rows = list(csv.reader(io.StringIO(self.export('csv').decode())))
+        self.assertEqual(rows[0], ['title', 'text', 'slug'])
+        self.assertEqual([tuple(row) for row in rows[1:]], expected)
+        archive = zipfile.ZipFile(io.BytesIO(self.export('zip')))
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(
+            archive.namelist(), [f'note-{index}.txt' for index in range(3)]
+        )
+        self.assertEqual(
+            archive.read('note-0.txt').decode(),
+            f'{expected[0][0]}\n\n{expected[0][1]}\n'
+        )
+
+    def test_unknown_format(self):
+        """Тестирование ответа 404 на неизвестный формат."""
+        response = self.client.get(self.EXPORT_URL, {'format': 'xml'})
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(NOTES_EXPORT_CHUNK_SIZE=100)
+    def test_memory_does_not_grow_with_notes(self):
+        """
+        Тестирование потоковой выгрузки: пик памяти при чтении ответа
+        почти не зависит от числа заметок.
+        """
+        def peak(count):
+            Note.objects.bulk_create(
+                Note(title='Т' * 100, text='Т' * 1000, author=self.author,
+                     slug=f'bulk-{count}-{index}')
+                for index in range(count)
+            )
+            response = self.client.get(self.EXPORT_URL, {'format': 'ndjson'})
+            tracemalloc.start()
+            for _ in response.streaming_content:
+                pass
+            result = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return result
+
+        small = peak(200)
+        # Во второй раз в базе в 10 раз больше заметок.
+        large = peak(1800)
+        self.assertLess(large, small * 2)
+
+
+class TestServerTiming(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор Саша')
+
+    def test_disabled_by_default(self):
+        """Без SERVER_TIMING_SAMPLE_RATE заголовка нет."""
+        response = self.client.get(reverse('notes:home'))
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(
+        SERVER_TIMING_SAMPLE_RATE=1.0, SERVER_TIMING_TEMPLATES=True
+    )
+    def test_list_timing(self):
+        """Тестирование фаз и времени шаблонов списка заметок."""
+        self.client.force_login(self.author)
+        header = self.client.get(reverse('notes:list'))['Server-Timing']
+        for phase in ('total;', 'db;', 'view;', 'template;'):
+            self.assertIn(phase, header)
+        self.assertIn('desc="notes/list.html"', header)
+
+    def test_template_timing_installed_only_when_enabled(self):
+        """Template._render подменяется только с SERVER_TIMING_TEMPLATES."""
+        render = getattr(Template._render, '__wrapped__', Template._render)
+        current = Template._render
+        self.addCleanup(setattr, Template, '_render', current)
+        Template._render = render
+        with self.settings(
+            SERVER_TIMING_SAMPLE_RATE=1.0, SERVER_TIMING_TEMPLATES=False
+        ):
+            ServerTimingMiddleware(lambda request: None)
+        self.assertIs(Template._render, render)
+        with self.settings(
+            SERVER_TIMING_SAMPLE_RATE=1.0, SERVER_TIMING_TEMPLATES=True
+        ):
+            ServerTimingMiddleware(lambda request: None)
+            ServerTimingMiddleware(lambda request: None)
+        self.assertIs(Template._render.__wrapped__, render)
@@ -1,12 +1,28 @@
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from http import HTTPStatus
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings
+)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from pytils.translit import slugify
 
 from notes.forms import WARNING
 from notes.models import Note
+from yanote.middleware import stats
 
 User = get_user_model()
 
@@ -90,6 +106,46 @@ class TestNoteCreate(TestCase):
         expected_slug = slugify(self.form_data['title'])
         self.assertEqual(new_note.slug, expected_slug)
 
+    def test_empty_slug_gets_free_suffix(self):
+        """Тестирование подбора свободного slug для одинаковых заголовков"""
+        self.form_data.pop('slug')
+        expected_slug = slugify(self.form_data['title'])
+        for suffix in ('', '-1', '-2'):
+            with self.subTest(suffix=suffix):
+                response = self.auth_client.post(
+                    self.ADD_PAGE_URL,
+                    data=self.form_data
+                )
+                self.assertRedirects(response, reverse('notes:success'))
+                self.assertTrue(
+                    Note.objects.filter(slug=expected_slug + suffix).exists()
+                )
+
+    def test_slug_is_reallocated_after_race(self):
+        """Тестирование повторного подбора slug, если его уже заняли"""
+        with mock.patch(
+                'notes.models.allocate_slug',
+                side_effect=(self.note.slug, 'free-slug')
+        ):
+            note = Note.objects.create(
+                title='Гонка', text='Текст', author=self.user
+            )
+        self.assertEqual(note.slug, 'free-slug')
+
+    def test_taken_explicit_slug_is_form_error(self):
+        """Тестирование slug, который заняли после проверки формы"""
+        with mock.patch(
+                'notes.forms.NoteForm.clean_slug',
+                return_value=self.note.slug
+        ), mock.patch('notes.forms.NoteForm.validate_unique'):
+            response = self.auth_client.post(
+                self.ADD_PAGE_URL, data=self.form_data
+            )
+        self.assertFormError(
+            response, 'form', 'slug', errors=(self.note.slug + WARNING)
+        )
+        self.assertEqual(Note.objects.count(), 1)
+
     def test_other_user_cant_edit_note(self):
         """Тестирование возможности редактирования заметки
         другим залогиненным пользователем.
@@ -135,3 +191,178 @@ class TestNoteCreate(TestCase):
         self.assertRedirects(response, reverse('notes:success'))
         note_count = Note.objects.count()
         self.assertEqual(equal_note_count - 1, note_count)
+
+
+class TestSlugRace(TransactionTestCase):
+    THREADS = 64
+    TITLE = 'Название заметки'
+
+    def setUp(self):
+        # Общая база в памяти не ждёт блокировок: гонка идёт в файле.
+        self.directory = TemporaryDirectory()
+        connections.databases['race'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': str(Path(self.directory.name) / 'race.sqlite3'),
+        }
+        call_command('migrate', database='race', verbosity=0)
+        self.author = User.objects.db_manager('race').create(
+            username='Автор'
+        )
+
+    def tearDown(self):
+        connections['race'].close()
+        del connections['race']
+        del connections.databases['race']
+        self.directory.cleanup()
+
+    def create(self, _):
+        try:
+            return Note.objects.using('race').create(
+                title=self.TITLE, text='Текст', author=self.author
+            ).slug
+        finally:
+            connections.close_all()
+
+    def test_same_title_in_parallel(self):
+        """Тестирование одновременного создания заметок с одним заголовком"""
+        with ThreadPoolExecutor(max_workers=self.THREADS) as executor:
+            slugs = list(executor.map(self.create, range(self.THREADS)))
+        self.assertEqual(len(set(slugs)), self.THREADS)
+        self.assertEqual(
+            Note.objects.using('race').count(), self.THREADS
+        )
+
+
+class TestBenchHttp(TransactionTestCase):
+
+    def test_generate_data_and_baseline(self):
+        """Нагрузочный прогон на сгенерированных данных пишет замер."""
+        call_command(
+            'generate_data', users=2, notes_per_user=3, stdout=StringIO()
+        )
+        self.assertEqual(Note.objects.count(), 6)
+        with TemporaryDirectory() as directory:
+            baseline = Path(directory) / 'baseline.json'
+            # Общая база в памяти не ждёт блокировок: один клиент.
+            call_command(
+                'bench_http', requests=4, concurrency=1,
+                save=str(baseline), stdout=StringIO()
+            )
+            scenarios = json.loads(baseline.read_text())['scenarios']
+        self.assertEqual(set(scenarios), {'list', 'add'})
+        for result in scenarios.values():
+            self.assertEqual(result['errors'], 0)
+        self.assertEqual(Note.objects.count(), 10)
+
+    def test_parallel_add_with_one_title(self):
+        """
+        Параллельные клиенты добавляют заметки с одним заголовком без ошибок.
+
+        Общая база в памяти не ждёт блокировок, поэтому прогон идёт в
+        отдельном процессе на файле базы из YANOTE_DB.
+        """
+        with TemporaryDirectory() as directory:
+            baseline = Path(directory) / 'baseline.json'
+            environ = {
+                **os.environ,
+                'YANOTE_DB': str(Path(directory) / 'bench.sqlite3'),
+            }
+            for command in (
+                ('migrate',),
+                ('generate_data', '--users', '32', '--notes-per-user', '1'),
+                ('bench_http', '--scenarios', 'add', '--requests', '128',
+                 '--concurrency', '32', '--save', str(baseline)),
+            ):
+                subprocess.run(
+                    (sys.executable, 'manage.py', *command),
+                    cwd=settings.BASE_DIR, env=environ, check=True,
+                    capture_output=True,
+                )
+            result = json.loads(baseline.read_text())['scenarios']['add']
+        self.assertEqual(result['requests'], 128)
+        self.assertEqual(result['errors'], 0)
+
+
+class TestCachedAuth(TestCase):
+    LIST_URL = reverse('notes:list')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='Автор')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.client.get(self.LIST_URL)
+
+    def test_session_and_user_come_from_cache(self):
+        """Повторный запрос не читает сессию и пользователя из базы."""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.LIST_URL)
+        for query in queries.captured_queries:
+            self.assertNotIn('FROM "django_session"', query['sql'])
+            self.assertNotIn('FROM "auth_user"', query['sql'])
+
+    def test_password_change_invalidates_cached_user(self):
+        """После смены пароля старая сессия сразу перестаёт действовать."""
+        self.user.set_password('Новый пароль')
+        self.user.save()
+        response = self.client.get(self.LIST_URL)
+        self.assertRedirects(
+            response, f'{reverse("users:login")}?next={self.LIST_URL}'
+        )
+
+    def test_logout_invalidates_session_copies(self):
+        """Копия cookie сессии после выхода не авторизует."""
+        copy = Client()
+        copy.cookies[settings.SESSION_COOKIE_NAME] = (
+            self.client.cookies[settings.SESSION_COOKIE_NAME].value
+        )
+        self.client.get(reverse('users:logout'))
+        response = copy.get(self.LIST_URL)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+
+class TestBenchAuth(TransactionTestCase):
+
+    def test_cached_modes_save_queries(self):
+        """Сессия и пользователь из кеша экономят запросы к базе."""
+        call_command(
+            'generate_data', users=1, notes_per_user=3, stdout=StringIO()
+        )
+        output = StringIO()
+        # Общая база в памяти не ждёт блокировок: один клиент.
+        call_command('bench_auth', requests=4, concurrency=1, stdout=output)
+        queries = {
+            line.split()[0]: float(line.split()[-1])
+            for line in output.getvalue().splitlines()[1:]
+        }
+        self.assertLess(queries['cached'], queries['db'])
+        self.assertLess(queries['signed'], queries['db'])
+
+
+class TestQueryBudget(TestCase):
+    METRICS_URL = settings.QUERY_METRICS_URL
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='Автор')
+
+    def setUp(self):
+        stats.reset()
+        self.client.force_login(self.user)
+
+    def test_metrics_disabled_by_default(self):
+        """Без QUERY_METRICS_ENABLED сводки нет."""
+        response = self.client.get(self.METRICS_URL)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    @override_settings(QUERY_METRICS_ENABLED=True)
+    def test_add_note_fits_budget(self):
+        """Заметка сохраняется один раз и укладывается в бюджет."""
+        self.client.post(reverse('notes:add'), data={
+            'title': 'Заголовок', 'text': 'Текст', 'slug': ''
+        })
+        metrics = self.client.get(self.METRICS_URL).json()['notes:add']
+        self.assertEqual(metrics['requests'], 1)
+        self.assertEqual(metrics['over_budget'], 0)
+        self.assertEqual(metrics['n_plus_one'], {})
@@ -0,0 +1,153 @@
+import os
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+
+from notes.models import Note
+from notes.search import rebuild_index
+
+User = get_user_model()
+
+# QUERY_BUDGETS_REPORT=1 pytest -s -k Budget печатает текущее число
+# запросов каждого маршрута и не падает на превышении бюджета.
+REPORT = bool(os.environ.get('QUERY_BUDGETS_REPORT'))
+
+PASSWORD = 'Пароль-автора'
+
+
+class TestQueryBudgets(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.author.set_password(PASSWORD)
+        cls.author.save()
+        cls.note = Note.objects.create(
+            title='Заголовок', text='Текст', author=cls.author, slug='note'
+        )
+
+    def setUp(self):
+        self.user_client = self.client_class()
+        self.user_client.force_login(self.author)
+
+    def routes(self):
+        """
+        Маршрут, метод, клиент и данные запроса.
+
+        Страницы заметок проверяются авторизованным пользователем.
+        """
+        note_args = (self.note.slug,)
+        return (
+            ('notes:home', 'GET', self.user_client, None, None),
+            ('notes:list', 'GET', self.user_client, None, None),
+            ('notes:search', 'GET', self.user_client, None, {'q': 'Заг'}),
+            ('notes:export', 'GET', self.user_client, None, {
+                'format': 'zip'
+            }),
+            ('notes:detail', 'GET', self.user_client, note_args, None),
+            ('notes:success', 'GET', self.user_client, None, None),
+            ('notes:add', 'GET', self.user_client, None, None),
+            ('notes:add', 'POST', self.user_client, None, {
+                'title': 'Новая заметка', 'text': 'Текст', 'slug': ''
+            }),
+            ('notes:edit', 'GET', self.user_client, note_args, None),
+            ('notes:edit', 'POST', self.user_client, note_args, {
+                'title': 'Заголовок', 'text': 'Новый текст', 'slug': 'note'
+            }),
+            ('notes:delete', 'GET', self.user_client, note_args, None),
+            ('notes:delete', 'POST', self.user_client, note_args, None),
+            ('users:login', 'GET', self.client, None, None),
+            ('users:login', 'POST', self.client, None, {
+                'username': self.author.username, 'password': PASSWORD
+            }),
+            ('users:logout', 'GET', self.user_client, None, None),
+            ('users:signup', 'GET', self.client, None, None),
+            ('users:signup', 'POST', self.client, None, {
+                'username': 'Новичок',
+                'password1': 'Пароль-новичка',
+                'password2': 'Пароль-новичка',
+            }),
+        )
+
+    def count_queries(self, client, method, url, data=None):
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(client, method.lower())(url, data)
+            # Потоковый ответ читает базу, пока его отдают.
+            if response.streaming:
+                b''.join(response.streaming_content)
+        return len(context)
+
+    def count_isolated(self, client, method, url, data=None):
+        """Число запросов, изменения в базе после замера откатываются."""
+        with transaction.atomic():
+            count = self.count_queries(client, method, url, data)
+            transaction.set_rollback(True)
+        return count
+
+    def test_every_route_has_budget(self):
+        """У каждого маршрута notes и users есть бюджет, и он проверяется."""
+        names = set()
+        for namespace in ('notes', 'users'):
+            _, resolver = get_resolver().namespace_dict[namespace]
+            names |= {
+                f'{namespace}:{name}'
+                for name in resolver.reverse_dict if isinstance(name, str)
+            }
+        self.assertEqual(names, set(settings.QUERY_BUDGETS))
+        self.assertEqual(
+            {(name, method) for name, method, *_ in self.routes()},
+            {
+                (name, method)
+                for name, methods in settings.QUERY_BUDGETS.items()
+                for method in methods
+            },
+        )
+
+    def test_query_budgets(self):
+        """Число запросов к базе не превышает бюджет маршрута."""
+        for name, method, client, args, data in self.routes():
+            with self.subTest(name=name, method=method):
+                count = self.count_isolated(
+                    client, method, reverse(name, args=args), data
+                )
+                budget = settings.QUERY_BUDGETS[name][method]
+                if REPORT:
+                    print(f'\n{name} {method}: {count} (бюджет {budget})')
+                    continue
+                self.assertLessEqual(count, budget)
+
+    def test_queries_do_not_grow_with_data(self):
+        """Страница с 1, 10 и 1000 заметками делает одно число запросов."""
+        urls = (
+            (reverse('notes:list'), None),
+            (reverse('notes:search'), {'q': 'Текст'}),
+            (reverse('notes:export'), {'format': 'csv'}),
+        )
+        for url, data in urls:
+            with self.subTest(url=url), transaction.atomic():
+                # Прогрев: пользователь сессии попадает в кеш.
+                self.user_client.get(url, data)
+                counts = []
+                for total in (1, 10, 1000):
+                    Note.objects.bulk_create(
+                        Note(
+                            title=f'Заметка {index}',
+                            text='Текст',
+                            slug=f'note-{index}',
+                            author=self.author,
+                        )
+                        for index in range(
+                            Note.objects.filter(author=self.author).count(),
+                            total,
+                        )
+                    )
+                    rebuild_index()
+                    counts.append(
+                        self.count_queries(self.user_client, 'GET', url, data)
+                    )
+                transaction.set_rollback(True)
+            self.assertEqual(len(set(counts)), 1, counts)
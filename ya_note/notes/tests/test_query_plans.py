@@ -0,0 +1,83 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes.models import Note
+
+User = get_user_model()
+
+# Те же признаки плохого плана проверяет
+# ya_news/news/pytest_tests/test_query_plans.py: проекты тестируются
+# отдельно и общих модулей не имеют.
+# «SCAN таблица» (до SQLite 3.36 — «SCAN TABLE таблица») без индекса —
+# полный проход по таблице.
+FULL_SCAN_RE = re.compile(r'\bSCAN (TABLE )?\w+$')
+TEMP_B_TREE = 'USE TEMP B-TREE'
+
+
+class TestQueryPlans(TestCase):
+    """
+    Запросы горячих страниц читают таблицы по индексам.
+
+    Каждый SELECT проверяется через EXPLAIN QUERY PLAN: ни полного
+    прохода по таблице, ни сортировки во временном B-дереве.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.other = User.objects.create(username='Другой автор')
+        for author in (cls.author, cls.other):
+            Note.objects.bulk_create(
+                Note(
+                    title=f'Заметка {index}',
+                    text='Текст',
+                    slug=f'note-{author.pk}-{index}',
+                    author=author,
+                )
+                for index in range(50)
+            )
+        cls.note = Note.objects.filter(author=cls.author).first()
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def assert_indexed(self, method, url, data=None):
+        with CaptureQueriesContext(connection) as context:
+            getattr(self.client, method)(url, data)
+        selects = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+        ]
+        self.assertTrue(selects)
+        for sql in selects:
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = [row[-1] for row in cursor.fetchall()]
+            problems = [
+                step for step in plan
+                if FULL_SCAN_RE.search(step) or TEMP_B_TREE in step
+            ]
+            self.assertFalse(problems, '\n'.join([sql, *plan]))
+
+    def test_note_base_queryset(self):
+        """NoteBase.get_queryset в списке и на страницах заметки."""
+        urls = (
+            reverse('notes:list'),
+            reverse('notes:detail', args=(self.note.slug,)),
+            reverse('notes:edit', args=(self.note.slug,)),
+            reverse('notes:delete', args=(self.note.slug,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assert_indexed('get', url)
+
+    def test_clean_slug_check(self):
+        """Проверка занятости slug в NoteForm.clean_slug."""
+        self.assert_indexed('post', reverse('notes:add'), {
+            'title': 'Заголовок', 'text': 'Текст', 'slug': self.note.slug
+        })
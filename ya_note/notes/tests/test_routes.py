@@ -25,6 +25,8 @@ class TestRoutes(TestCase):
         cls.signup_url = reverse('users:signup', None)
         cls.add_url = reverse('notes:add', None)
         cls.list_url = reverse('notes:list', None)
+        cls.search_url = reverse('notes:search', None)
+        cls.export_url = reverse('notes:export', None)
         cls.success_url = reverse('notes:success', None)
         cls.edit_url = reverse('notes:edit', args=(cls.note.slug,))
         cls.detail_url = reverse('notes:detail', args=(cls.note.slug,))
@@ -51,6 +53,8 @@ class TestRoutes(TestCase):
             self.delete_url,
             self.add_url,
             self.list_url,
+            self.search_url,
+            self.export_url,
             self.success_url,
         )
         for elem in urls:
@@ -66,6 +70,8 @@ class TestRoutes(TestCase):
         urls = (
             self.add_url,
             self.list_url,
+            self.search_url,
+            self.export_url,
             self.success_url,
             self.detail_url,
             self.edit_url,
@@ -1,9 +1,14 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import IntegrityError, transaction
+from django.http import Http404, StreamingHttpResponse
 from django.urls import reverse_lazy
 from django.views import generic
 
-from .forms import NoteForm
+from . import export
+from .forms import WARNING, NoteForm
 from .models import Note
+from .search import search_note_ids
 
 
 class Home(generic.TemplateView):
@@ -26,22 +31,40 @@ class NoteBase(LoginRequiredMixin):
         return self.model.objects.filter(author=self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
-    """Добавление заметки."""
+class NoteFormBase(NoteBase):
+    """Базовый класс для создания и редактирования заметки."""
     template_name = 'notes/form.html'
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        """
+        Сохраняет заметку; занятый slug — ошибка формы, а не 500.
+
+        NoteForm.clean_slug проверяет slug заранее, но параллельный
+        запрос может занять его до сохранения.
+        """
+        slug = form.cleaned_data.get('slug')
+        if not slug:
+            # Свободный slug по заголовку подбирает Note.save().
+            return super().form_valid(form)
+        try:
+            with transaction.atomic():
+                return super().form_valid(form)
+        except IntegrityError:
+            form.add_error('slug', slug + WARNING)
+            return self.form_invalid(form)
+
+
+class NoteCreate(NoteFormBase, generic.CreateView):
+    """Добавление заметки."""
+
+    def form_valid(self, form):
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(NoteFormBase, generic.UpdateView):
     """Редактирование заметки."""
-    template_name = 'notes/form.html'
-    form_class = NoteForm
 
 
 class NoteDelete(NoteBase, generic.DeleteView):
@@ -53,7 +76,96 @@ class NotesList(NoteBase, generic.ListView):
     """Список всех заметок пользователя."""
     template_name = 'notes/list.html'
 
+    def get_queryset(self):
+        """
+        Заметки с id больше GET-параметра after по возрастанию id.
+
+        Читаются только поля, которые выводит шаблон.
+        """
+        queryset = super().get_queryset().only(
+            'id', 'slug', 'title'
+        ).order_by('id')
+        after = self.request.GET.get('after')
+        if after:
+            try:
+                queryset = queryset.filter(pk__gt=int(after))
+            except ValueError:
+                raise Http404('Некорректный параметр after.')
+        return queryset
+
+    def get_context_data(self, **kwargs):
+        """
+        Первые NOTES_PER_PAGE заметок и next_after для следующей страницы.
+
+        Лишняя заметка в выборке показывает, что страница не последняя.
+        """
+        per_page = settings.NOTES_PER_PAGE
+        notes = list(self.object_list[:per_page + 1])
+        page = notes[:per_page]
+        next_after = page[-1].pk if len(notes) > per_page else None
+        return super().get_context_data(
+            object_list=page, next_after=next_after, **kwargs
+        )
+
+
+class NoteSearch(NoteBase, generic.ListView):
+    """Поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+
+    def get_queryset(self):
+        """
+        Заметки по запросу из GET-параметра q, лучшие первыми.
+
+        Индекс ищет только среди заметок автора, а выборка через
+        NoteBase.get_queryset ещё раз проверяет владельца.
+        """
+        ids = search_note_ids(
+            self.request.user.pk,
+            self.request.GET.get('q', ''),
+            settings.NOTES_SEARCH_LIMIT,
+        )
+        notes = super().get_queryset().only(
+            'id', 'slug', 'title'
+        ).in_bulk(ids)
+        return [notes[pk] for pk in ids if pk in notes]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
 
 class NoteDetail(NoteBase, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+
+
+class NoteExport(NoteBase, generic.View):
+    """
+    Все заметки пользователя одним файлом: NDJSON, CSV или ZIP.
+
+    Формат — GET-параметр format. Заметки читаются из базы порциями по
+    NOTES_EXPORT_CHUNK_SIZE и отдаются потоком, поэтому память не
+    зависит от их числа.
+    """
+    formats = {
+        'ndjson': (export.stream_ndjson, 'application/x-ndjson'),
+        'csv': (export.stream_csv, 'text/csv'),
+        'zip': (export.stream_zip, 'application/zip'),
+    }
+
+    def get(self, request, *args, **kwargs):
+        name = request.GET.get('format', 'ndjson')
+        if name not in self.formats:
+            raise Http404('Неизвестный формат выгрузки.')
+        stream, content_type = self.formats[name]
+        rows = self.get_queryset().order_by('id').values_list(
+            *export.FIELDS
+        ).iterator(chunk_size=settings.NOTES_EXPORT_CHUNK_SIZE)
+        response = StreamingHttpResponse(
+            stream(rows), content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="notes.{name}"'
+        )
+        return response
@@ -1,3 +1,5 @@
+import json
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -22,6 +24,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yanote.middleware.ServerTimingMiddleware',
+    'yanote.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -55,11 +59,30 @@ WSGI_APPLICATION = 'yanote.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        # YANOTE_DB — другой файл базы, например для нагрузочного прогона.
+        'NAME': os.environ.get('YANOTE_DB', BASE_DIR / 'db.sqlite3'),
+        # Файл тестовой базы для parallel_tests.py, иначе база в памяти.
+        'TEST': {'NAME': os.environ.get('YANOTE_TEST_DB')},
     }
 }
 
 
+# Сессии читаются из кеша, база — запасное хранилище. С
+# YANOTE_SIGNED_COOKIE_SESSIONS=1 сессия целиком хранится в подписанной
+# cookie: без обращений к базе, но выход не отзывает её копии.
+SESSION_ENGINE = (
+    'django.contrib.sessions.backends.signed_cookies'
+    if os.environ.get('YANOTE_SIGNED_COOKIE_SESSIONS')
+    else 'django.contrib.sessions.backends.cached_db'
+)
+
+# Пользователь сессии тоже берётся из кеша, см. notes.auth. При
+# нескольких процессах кеш должен быть общим, иначе выход и смена
+# пароля видны только в одном из них.
+AUTHENTICATION_BACKENDS = ['notes.auth.CachedModelBackend']
+AUTH_USER_CACHE_TIMEOUT = 60 * 5
+
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
@@ -87,3 +110,26 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_PER_PAGE = 100
+
+NOTES_SEARCH_LIMIT = 50
+
+# Заметок в одной порции чтения из базы при выгрузке notes:export.
+NOTES_EXPORT_CHUNK_SIZE = 500
+
+# Сводка запросов к базе по представлениям, см. yanote.middleware.
+QUERY_METRICS_ENABLED = DEBUG
+QUERY_METRICS_URL = '/__queries__/'
+# Столько одинаковых запросов за ответ считаются признаком N+1.
+QUERY_REPEAT_THRESHOLD = 5
+# Предельное число запросов к базе по имени представления и методу.
+# Тот же файл проверяют тесты notes/tests/test_query_budgets.py.
+QUERY_BUDGETS = json.loads(
+    (BASE_DIR / 'yanote' / 'query_budgets.json').read_text(encoding='utf-8')
+)
+
+# Доля запросов с заголовком Server-Timing, от 0 до 1; 0 — выключено.
+SERVER_TIMING_SAMPLE_RATE = 1.0 if DEBUG else 0.0
+# Добавлять в Server-Timing время каждого шаблона и include.
+SERVER_TIMING_TEMPLATES = False